@@ -0,0 +1,126 @@
+"""
+Compare blocking and thread-pool calorie lookups under many concurrent agent sessions.
+
+Each simulated session alternates a model turn (asyncio.sleep) with a calorie
+lookup, like an agent run does. Queries are unique so neither the result cache
+nor the food name index can answer them, and every call is a real vector search.
+Each mode gets its own empty embedding cache in a temporary directory, so both
+embed every query (cold); with --warm-embeddings the queries are embedded into
+it before the clock starts and only the thread pool is compared.
+Needs a populated chroma/nutrition_db. Run from the project root:
+
+    python -m benchmarks.bench_async_tools --sessions 50
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List
+
+from utils import embedding_cache
+from utils.calorie_lookup import calorie_lookup_cache
+from utils.embedding_cache import EmbeddingCache, default_embedding_cache
+from utils.retrieval_service import RetrievalService
+
+MEAL_WORDS = ["grilled", "roasted", "spicy", "creamy", "baked", "fried", "sweet", "smoked"]
+
+
+def session_queries(session: int, calls: int):
+    return [
+        f"{MEAL_WORDS[(session + call) % len(MEAL_WORDS)]} meal {session}-{call} with vegetables"
+        for call in range(calls)
+    ]
+
+
+@contextmanager
+def temporary_embedding_cache(warm_queries: List[str]):
+    """
+    Point default_embedding_cache() at an empty cache in a temporary directory,
+    holding warm_queries if any, so one mode never profits from the embeddings
+    of another or of an earlier invocation.
+    """
+    shared = default_embedding_cache()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = EmbeddingCache(directory, embedding_function=shared.embedding_function)
+        if warm_queries:
+            cache.embed(warm_queries)
+            cache.hits = cache.misses = 0
+        embedding_cache._default_cache = cache
+        try:
+            yield cache
+        finally:
+            embedding_cache._default_cache = shared
+
+
+async def run_session(session: int, calls: int, model_latency: float, use_async: bool):
+    service = RetrievalService()
+    for query in session_queries(session, calls):
+        await asyncio.sleep(model_latency)  # the model deciding on the next tool call
+        if use_async:
+            await service.alookup_calories(query)
+        else:
+            service.lookup_calories(query)
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """
+    Largest delay of a periodic timer, i.e. how long the event loop was blocked.
+    """
+    worst = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - expected)
+    return worst
+
+
+async def run(sessions: int, calls: int, model_latency: float, use_async: bool):
+    calorie_lookup_cache.invalidate()
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(run_session(session, calls, model_latency, use_async) for session in range(sessions))
+    )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    return elapsed, await lag_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--calls-per-session", type=int, default=4)
+    parser.add_argument("--model-latency", type=float, default=0.2, help="seconds per simulated model turn")
+    parser.add_argument("--workers", type=int, default=8, help="retrieval thread pool size")
+    parser.add_argument(
+        "--warm-embeddings", action="store_true", help="embed the queries before timing instead of during the run"
+    )
+    args = parser.parse_args()
+
+    service = RetrievalService()
+    service.max_workers = args.workers
+    service.warmup()
+
+    total_calls = args.sessions * args.calls_per_session
+    queries = [query for session in range(args.sessions) for query in session_queries(session, args.calls_per_session)]
+    warm_queries = queries if args.warm_embeddings else []
+    print(f"{args.sessions} sessions x {args.calls_per_session} lookups, {args.model_latency}s per model turn")
+    print(f"embedding cache: {'warm' if args.warm_embeddings else 'cold'}, a fresh one per mode")
+    print(f"{'mode':>10} {'wall (s)':>9} {'lookups/s':>10} {'max loop lag (ms)':>18} {'embedding hits/misses':>22}")
+    for label, use_async in (("blocking", False), ("async", True)):
+        with temporary_embedding_cache(warm_queries) as cache:
+            elapsed, lag = asyncio.run(
+                run(args.sessions, args.calls_per_session, args.model_latency, use_async)
+            )
+            stats = cache.stats()
+        hits_misses = f"{stats['hits']}/{stats['misses']}"
+        print(f"{label:>10} {elapsed:>9.2f} {total_calls / elapsed:>10.1f} {lag * 1000:>18.1f} {hits_misses:>22}")
+
+
+if __name__ == "__main__":
+    main()
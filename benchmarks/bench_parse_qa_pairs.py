@@ -0,0 +1,105 @@
+"""
+Benchmark the in-memory and the streaming Q&A parsers on a synthetic corpus.
+
+Each parser runs in its own process so that its peak memory can be measured.
+Run from the project root:
+
+    python -m benchmarks.bench_parse_qa_pairs --size-mb 2048
+    python -m benchmarks.bench_parse_qa_pairs --size-mb 4096 --skip-in-memory
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from rag_nutrients_qa_data_setup import iter_qa_pairs, parse_qa_pairs
+
+
+def make_synthetic_corpus(path: str, size_mb: int) -> int:
+    """
+    Write questions_output.txt style Q&A pairs until the file reaches size_mb.
+    Returns the number of pairs written.
+    """
+    target_bytes = size_mb * 1024 * 1024
+    block_pairs = 10_000
+    written = 0
+    pairs = 0
+    with open(path, "w", encoding="utf-8") as file:
+        while written < target_bytes:
+            block = "".join(
+                f"Question: How much vitamin {i % 13} is in food number {pairs + i}?\n"
+                f"Answer: Food number {pairs + i} has {i % 97} mg of vitamin {i % 13} per 100 grams "
+                f"and is a good source of fibre, protein and minerals for a balanced diet.\n\n"
+                for i in range(block_pairs)
+            )
+            file.write(block)
+            written += len(block.encode("utf-8"))
+            pairs += block_pairs
+    return pairs
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_parser(name: str, path: str, sample_percentage: float, results):
+    baseline_mb = _peak_rss_mb()
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        if name == "in-memory":
+            count = len(parse_qa_pairs(path, sample_percentage, seed=0))
+        else:
+            count = sum(1 for _ in iter_qa_pairs(path, sample_percentage, seed=0))
+        elapsed = time.perf_counter() - start
+    results.put((name, elapsed, baseline_mb, _peak_rss_mb(), count))
+
+
+def run_in_subprocess(name: str, path: str, sample_percentage: float):
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_run_parser, args=(name, path, sample_percentage, results)
+    )
+    process.start()
+    outcome = results.get()
+    process.join()
+    return outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--sample-percentage", type=float, default=0.05)
+    parser.add_argument("--skip-in-memory", action="store_true", help="only run the streaming parser")
+    parser.add_argument("--tmp-dir", default=None, help="where to write the synthetic corpus")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp_dir:
+        path = os.path.join(tmp_dir, "questions_output.txt")
+        start = time.perf_counter()
+        pairs = make_synthetic_corpus(path, args.size_mb)
+        file_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"Synthetic corpus: {pairs} pairs, {file_mb:.0f} MB (written in {time.perf_counter() - start:.1f}s)")
+
+        parsers = ["streaming"] if args.skip_in_memory else ["in-memory", "streaming"]
+        print(
+            f"{'parser':>10} {'time (s)':>9} {'baseline RSS (MB)':>18} "
+            f"{'peak RSS (MB)':>14} {'parser overhead (MB)':>21} {'sampled pairs':>14}"
+        )
+        for name in parsers:
+            name, elapsed, baseline_mb, peak_mb, count = run_in_subprocess(
+                name, path, args.sample_percentage
+            )
+            print(
+                f"{name:>10} {elapsed:>9.2f} {baseline_mb:>18.0f} "
+                f"{peak_mb:>14.0f} {peak_mb - baseline_mb:>21.0f} {count:>14}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark the row-by-row and the columnar nutrition document builders.
+
+Synthetic CSVs are made by repeating data/calories.csv up to the requested
+row count. Run from the project root:
+
+    python -m benchmarks.bench_prepare_nutrition_documents
+    python -m benchmarks.bench_prepare_nutrition_documents --sizes 10000 100000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from rag_calories_data_setup import (
+    prepare_nutrition_documents,
+    prepare_nutrition_documents_columnar,
+)
+
+
+def make_synthetic_csv(source_csv: str, rows: int, target_path: str) -> None:
+    """
+    Write a CSV with `rows` rows by repeating the source catalog.
+    """
+    df = pd.read_csv(source_csv)
+    repeats = -(-rows // len(df))  # ceiling division
+    pd.concat([df] * repeats, ignore_index=True).head(rows).to_csv(
+        target_path, index=False
+    )
+
+
+def time_builder(builder, csv_path: str):
+    """
+    Run a builder once with its progress prints silenced.
+    Returns the elapsed seconds and the built data.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        data = builder(csv_path)
+        elapsed = time.perf_counter() - start
+    return elapsed, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", default="data/calories.csv")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'row-by-row (s)':>15} {'columnar (s)':>13} {'speedup':>8} identical")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.sizes:
+            csv_path = os.path.join(tmp_dir, f"calories_{rows}.csv")
+            make_synthetic_csv(args.csv, rows, csv_path)
+
+            rowwise_time, rowwise_data = time_builder(prepare_nutrition_documents, csv_path)
+            columnar_time, columnar_data = time_builder(
+                prepare_nutrition_documents_columnar, csv_path
+            )
+
+            print(
+                f"{rows:>10} {rowwise_time:>15.2f} {columnar_time:>13.2f} "
+                f"{rowwise_time / columnar_time:>7.1f}x {rowwise_data == columnar_data}"
+            )
+
+
+if __name__ == "__main__":
+    main()
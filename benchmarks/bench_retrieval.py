@@ -0,0 +1,236 @@
+"""
+Measure retrieval latency, throughput and recall@k of the nutrition_db and nutrition_qna collections.
+
+Query sets are generated from the data, so the document each query should find
+is known: food names from calories.csv (as written, phrased as a question and
+with a typo) for nutrition_db, and stored questions for nutrition_qna.
+Every query set runs in each search mode (vector, lexical, hybrid; see
+utils/hybrid_search.py) at each n_results and batch size. Latency is per search
+call (one call answers a whole batch) and the query embeddings are computed up
+front, so only the search is timed.
+
+Results are saved as JSON and compared with the previous run (or --baseline),
+so index settings can be changed and checked for regressions.
+Needs populated collections. Run from the project root:
+
+    python -m benchmarks.bench_retrieval --queries 200 --n-results 1 3 10 --batch-sizes 1 8 32
+    python -m benchmarks.bench_retrieval --modes vector hybrid --n-results 3
+    python -m benchmarks.bench_retrieval --label ef-search-100 --baseline benchmarks/results/retrieval-<time>.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import time
+from typing import Dict, List, Optional, Set
+
+from utils.embedding_cache import default_embedding_cache
+from utils.hybrid_search import SEARCH_MODES, hybrid_query
+from utils.food_index import food_record_id, load_food_metadatas, normalize_food_name
+from utils.latency import percentiles
+from utils.retrieval_service import RetrievalService
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+LATENCY_POINTS = (50, 95, 99)
+
+
+def _typo(text: str, rng: random.Random) -> str:
+    """
+    Swap two neighbouring letters of one of the longer words.
+    """
+    words = text.split()
+    candidates = [i for i, word in enumerate(words) if len(word) >= 4]
+    if not candidates:
+        return text
+    i = rng.choice(candidates)
+    j = rng.randrange(1, len(words[i]) - 2)
+    word = words[i]
+    words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return " ".join(words)
+
+
+def food_query_sets(count: int, rng: random.Random) -> List[Dict]:
+    """
+    nutrition_db query sets. Ids are food_record_id as written by rag_calories_data_setup.py,
+    and every row with the same name counts as relevant.
+    """
+    metadatas = load_food_metadatas()
+    ids_by_name: Dict[str, Set[str]] = {}
+    seen = {}
+    for metadata in metadatas:
+        record_id = food_record_id(metadata["food_item"], metadata["food_category"], seen)
+        ids_by_name.setdefault(normalize_food_name(metadata["food_item"]), set()).add(record_id)
+
+    names = rng.sample(sorted(ids_by_name), min(count, len(ids_by_name)))
+    relevant = [ids_by_name[name] for name in names]
+    return [
+        {"name": "food_exact", "collection": "nutrition_db", "queries": names, "relevant": relevant},
+        {
+            "name": "food_question",
+            "collection": "nutrition_db",
+            "queries": [f"How many calories are in {name}?" for name in names],
+            "relevant": relevant,
+        },
+        {
+            "name": "food_typo",
+            "collection": "nutrition_db",
+            "queries": [_typo(name, rng) for name in names],
+            "relevant": relevant,
+        },
+    ]
+
+
+def qna_query_set(collection, count: int, rng: random.Random) -> Dict:
+    """
+    nutrition_qna query set: a random window of stored questions, each expected to find its own pair.
+    """
+    total = collection.count()
+    offset = rng.randrange(max(1, total - count + 1))
+    stored = collection.get(limit=count, offset=offset, include=["metadatas"])
+    return {
+        "name": "qna_question",
+        "collection": collection.name,
+        "queries": [metadata["question"] for metadata in stored["metadatas"]],
+        "relevant": [{record_id} for record_id in stored["ids"]],
+    }
+
+
+def searcher(collection, mode: str, query_texts: List[str]):
+    """
+    (search function, its inputs): search(batch, n_results) returns the ids found for every query in the batch.
+    """
+    if mode == "vector":
+        embeddings = default_embedding_cache().embed(query_texts)
+        search = lambda batch, k: collection.query(query_embeddings=batch, n_results=k, include=[])["ids"]
+        return search, embeddings
+    return (lambda batch, k: hybrid_query(collection, batch, k, mode=mode)["ids"]), query_texts
+
+
+def run_case(search, queries: List, relevant: List[Set[str]], n_results: int, batch_size: int) -> Dict:
+    call_seconds = []
+    found = 0
+    start = time.perf_counter()
+    for first in range(0, len(queries), batch_size):
+        call_start = time.perf_counter()
+        found_ids = search(queries[first:first + batch_size], n_results)
+        call_seconds.append(time.perf_counter() - call_start)
+        for ids, expected in zip(found_ids, relevant[first:first + batch_size]):
+            found += bool(expected.intersection(ids))
+    elapsed = time.perf_counter() - start
+
+    case = {
+        "n_results": n_results,
+        "batch_size": batch_size,
+        "queries": len(queries),
+        "calls": len(call_seconds),
+        "qps": len(queries) / elapsed if elapsed else 0.0,
+        "recall": found / len(queries) if queries else 0.0,
+    }
+    case.update({f"{name}_ms": seconds * 1000 for name, seconds in percentiles(call_seconds, LATENCY_POINTS).items()})
+    return case
+
+
+def run_benchmark(
+    query_sets: List[Dict], n_results: List[int], batch_sizes: List[int], modes: List[str] = ("vector",)
+) -> List[Dict]:
+    service = RetrievalService()
+    cases = []
+    for query_set in query_sets:
+        collection = service.collection(query_set["collection"])
+        default_embedding_cache().embed(query_set["queries"])  # embed once, outside the timings
+        for mode in modes:
+            search, queries = searcher(collection, mode, query_set["queries"])
+            search(queries[:1], 1)  # warm up the index
+            for k in n_results:
+                for batch_size in batch_sizes:
+                    case = run_case(search, queries, query_set["relevant"], k, batch_size)
+                    case.update({"query_set": query_set["name"], "collection": query_set["collection"], "mode": mode})
+                    cases.append(case)
+                    print(
+                        f"{query_set['name']:>14} {mode:>7} {k:>4} {batch_size:>6} {case['p50_ms']:>8.2f} "
+                        f"{case['p95_ms']:>8.2f} {case['p99_ms']:>8.2f} {case['qps']:>9.1f} {case['recall']:>9.3f}"
+                    )
+    return cases
+
+
+def collection_info(names: List[str]) -> Dict:
+    service = RetrievalService()
+    info = {}
+    for name in names:
+        collection = service.collection(name)
+        info[name] = {"count": collection.count(), "metadata": collection.metadata}
+    return info
+
+
+def latest_results(results_dir: str, exclude: Optional[str] = None) -> Optional[str]:
+    paths = sorted(path for path in glob.glob(os.path.join(results_dir, "retrieval-*.json")) if path != exclude)
+    return paths[-1] if paths else None
+
+
+def compare(current: Dict, previous: Dict) -> None:
+    """
+    Print how latency, throughput and recall moved for every case both runs have.
+    """
+    key = lambda case: (case["query_set"], case.get("mode", "vector"), case["n_results"], case["batch_size"])
+    before = {key(case): case for case in previous["cases"]}
+    print(f"\ncompared with {previous.get('label') or previous['timestamp']}:")
+    print(f"{'query set':>14} {'mode':>7} {'k':>4} {'batch':>6} {'p95 ms':>16} {'qps':>18} {'recall':>16}")
+    for case in current["cases"]:
+        old = before.get(key(case))
+        if old is None:
+            continue
+        print(
+            f"{case['query_set']:>14} {case['mode']:>7} {case['n_results']:>4} {case['batch_size']:>6} "
+            f"{old['p95_ms']:>7.2f}->{case['p95_ms']:<7.2f} "
+            f"{old['qps']:>8.1f}->{case['qps']:<8.1f} "
+            f"{old['recall']:>6.3f}->{case['recall']:<6.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200, help="queries per query set")
+    parser.add_argument("--n-results", type=int, nargs="+", default=[1, 3, 10])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--collections", nargs="+", default=["nutrition_db", "nutrition_qna"])
+    parser.add_argument("--modes", nargs="+", choices=SEARCH_MODES, default=["vector"])
+    parser.add_argument("--seed", type=int, default=0, help="seed for the query sample")
+    parser.add_argument("--label", help="name for this run, e.g. the index settings under test")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--baseline", help="results file to compare with (default: the previous run)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    query_sets = []
+    if "nutrition_db" in args.collections:
+        query_sets.extend(food_query_sets(args.queries, rng))
+    if "nutrition_qna" in args.collections:
+        query_sets.append(qna_query_set(RetrievalService().collection("nutrition_qna"), args.queries, rng))
+
+    print(f"{'query set':>14} {'mode':>7} {'k':>4} {'batch':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'qps':>9} {'recall@k':>9}")
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "label": args.label,
+        "seed": args.seed,
+        "collections": collection_info(args.collections),
+        "cases": run_benchmark(query_sets, args.n_results, args.batch_sizes, args.modes),
+    }
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    suffix = f"-{re.sub(r'[^A-Za-z0-9_.-]+', '-', args.label)}" if args.label else ""
+    path = os.path.join(args.results_dir, f"retrieval-{time.strftime('%Y%m%d-%H%M%S')}{suffix}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(run, file, indent=2)
+    print(f"\nresults saved to {path}")
+
+    baseline = args.baseline or latest_results(args.results_dir, exclude=path)
+    if baseline:
+        with open(baseline, "r", encoding="utf-8") as file:
+            compare(run, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
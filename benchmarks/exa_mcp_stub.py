@@ -0,0 +1,110 @@
+"""
+Local stand-in for the Exa search MCP server.
+
+Serves a web_search_exa tool over Streamable HTTP that answers from a small set
+of canned recipe pages, in the same shape as Exa's results, after a simulated
+delay. Point the agents at it to benchmark the MCP path offline:
+
+    python -m benchmarks.exa_mcp_stub --port 8765 --latency 0.3
+    EXA_MCP_URL=http://127.0.0.1:8765/mcp python run_batch.py --agent calorie_agent_with_search ...
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import uuid
+
+from mcp.server.fastmcp import FastMCP
+
+CANNED_PAGES = [
+    {
+        "title": "Full English Breakfast Recipe",
+        "url": "https://example.com/recipes/full-english-breakfast",
+        "text": "Ingredients: 2 pork sausages, 2 rashers of bacon, 1 egg, 100g baked beans, "
+        "1 tomato, 80g mushrooms, 1 slice of black pudding, 1 slice of toast with butter.",
+    },
+    {
+        "title": "Classic Avocado Toast with Egg",
+        "url": "https://example.com/recipes/avocado-toast",
+        "text": "Ingredients: 2 slices whole wheat bread, 1/2 avocado, 1 egg, lemon juice, "
+        "salt, pepper and chili flakes.",
+    },
+    {
+        "title": "Banana Oatmeal Bowl",
+        "url": "https://example.com/recipes/banana-oatmeal",
+        "text": "Ingredients: 40g rolled oats, 200ml milk, 1 banana, 1 tsp honey, a pinch of cinnamon.",
+    },
+    {
+        "title": "Greek Yogurt Parfait with Berries",
+        "url": "https://example.com/recipes/yogurt-parfait",
+        "text": "Ingredients: 170g greek yogurt, 75g blueberries, 50g strawberries, 30g granola, 1 tsp honey.",
+    },
+    {
+        "title": "Spinach and Feta Omelette",
+        "url": "https://example.com/recipes/spinach-omelette",
+        "text": "Ingredients: 3 eggs, 30g spinach, 30g feta cheese, 1 tsp olive oil, salt and pepper.",
+    },
+    {
+        "title": "Chicken Caesar Salad",
+        "url": "https://example.com/recipes/caesar-salad",
+        "text": "Ingredients: 150g chicken breast, romaine lettuce, 20g parmesan, croutons, caesar dressing.",
+    },
+    {
+        "title": "Spaghetti Bolognese",
+        "url": "https://example.com/recipes/bolognese",
+        "text": "Ingredients: 100g spaghetti, 125g minced beef, 1 onion, 1 carrot, 200g chopped tomatoes, "
+        "1 garlic clove, olive oil.",
+    },
+    {
+        "title": "Peanut Butter Banana Smoothie",
+        "url": "https://example.com/recipes/pb-banana-smoothie",
+        "text": "Ingredients: 1 banana, 1 tbsp peanut butter, 250ml milk, 1 tsp honey, ice.",
+    },
+]
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"[a-z]+", text.lower()))
+
+
+def search_canned_pages(query: str, num_results: int = 5) -> dict:
+    """
+    The canned pages ranked by how many query words they contain, in Exa's result format.
+    """
+    query_words = _words(query)
+    scored = []
+    for position, page in enumerate(CANNED_PAGES):
+        overlap = len(query_words & _words(page["title"] + " " + page["text"]))
+        scored.append((-overlap, position, page))
+    scored.sort(key=lambda item: item[:2])
+
+    results = [
+        {"id": page["url"], "title": page["title"], "url": page["url"], "publishedDate": None,
+         "author": None, "text": page["text"]}
+        for _, _, page in scored[:num_results]
+    ]
+    return {"requestId": uuid.uuid4().hex, "resolvedSearchType": "neural", "results": results}
+
+
+def build_server(host: str, port: int, latency: float) -> FastMCP:
+    server = FastMCP("Exa Search stand-in", host=host, port=port, stateless_http=False)
+
+    @server.tool()
+    async def web_search_exa(query: str, numResults: int = 5) -> str:
+        """Search the web and return the content of the best matching pages."""
+        await asyncio.sleep(latency)
+        return json.dumps(search_canned_pages(query, numResults), indent=2)
+
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated seconds per search")
+    args = parser.parse_args()
+
+    print(f"Serving canned Exa search on http://{args.host}:{args.port}/mcp")
+    build_server(args.host, args.port, args.latency).run(transport="streamable-http")
@@ -0,0 +1,186 @@
+"""
+Sweep HNSW index settings on our data and recommend the fastest that meets a target recall.
+
+The stored embeddings of a collection are copied into an in-memory collection for
+every combination of --spaces, --max-neighbors (M), --ef-construction and
+--ef-search (chroma only picks up ef_search when it loads an index, so each
+setting gets its own build) and queried with the bench_retrieval query sets.
+Recall@k is measured against the exact (brute force) nearest neighbours, so it
+shows only what the approximate index loses. The recommendation is printed as
+CHROMA_HNSW_* settings for .env (read by the setup scripts).
+Needs a populated collection. Run from the project root:
+
+    python -m benchmarks.tune_hnsw --collection nutrition_db --target-recall 0.98
+    python -m benchmarks.tune_hnsw --collection nutrition_qna --max-neighbors 8 16 32 --ef-search 16 32 64 128
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from benchmarks.bench_retrieval import RESULTS_DIR, food_query_sets, qna_query_set
+from utils.chroma_ingest import DEFAULT_BATCH_SIZE, hnsw_configuration
+from utils.embedding_cache import default_embedding_cache
+from utils.latency import percentiles
+from utils.retrieval_service import RetrievalService
+
+
+def load_vectors(collection, page_size: int = DEFAULT_BATCH_SIZE) -> Tuple[List[str], np.ndarray]:
+    ids, vectors = [], []
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(limit=page_size, offset=offset, include=["embeddings"])
+        ids.extend(page["ids"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+    return ids, np.concatenate(vectors)
+
+
+def exact_neighbours(ids: List[str], vectors: np.ndarray, queries: np.ndarray, k: int, space: str) -> List[Set[str]]:
+    """
+    The true top-k ids of every query under the collection's distance.
+    """
+    if space == "l2":
+        scores = -((queries ** 2).sum(1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(1)[None, :])
+    elif space == "cosine":
+        unit = lambda x: x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+        scores = unit(queries) @ unit(vectors).T
+    else:  # ip
+        scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [{ids[i] for i in row} for row in top]
+
+
+def build_index(client, ids: List[str], vectors: np.ndarray, hnsw: Dict, batch_size: int):
+    name = "tune_" + "_".join(f"{key}-{value}" for key, value in hnsw.items())
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    collection = client.create_collection(
+        name=name, configuration=hnsw_configuration(hnsw), embedding_function=None
+    )
+    for first in range(0, len(ids), batch_size):
+        collection.add(ids=ids[first:first + batch_size], embeddings=vectors[first:first + batch_size])
+    return collection
+
+
+def measure(collection, queries: np.ndarray, truth: List[Set[str]], k: int) -> Dict:
+    call_seconds = []
+    found = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = collection.query(query_embeddings=[query], n_results=k, include=[])
+        call_seconds.append(time.perf_counter() - start)
+        found += len(expected.intersection(results["ids"][0]))
+    latency = percentiles(call_seconds, (50, 95, 99))
+    return {
+        "recall": found / (len(truth) * k) if truth else 0.0,
+        "qps": len(call_seconds) / sum(call_seconds) if call_seconds else 0.0,
+        **{f"{name}_ms": seconds * 1000 for name, seconds in latency.items()},
+    }
+
+
+def recommend(results: List[Dict], target_recall: float) -> Optional[Dict]:
+    """
+    The lowest p95 latency among the settings that reach the target recall,
+    or the best recall if none does.
+    """
+    passing = [result for result in results if result["recall"] >= target_recall]
+    if passing:
+        return min(passing, key=lambda result: (result["p95_ms"], -result["recall"]))
+    return max(results, key=lambda result: (result["recall"], -result["p95_ms"]), default=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--collection", default="nutrition_db", choices=["nutrition_db", "nutrition_qna"])
+    parser.add_argument("--target-recall", type=float, default=0.95, help="recall@k against exact search")
+    parser.add_argument("--k", type=int, default=10, help="n_results of the measured queries")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--spaces", nargs="+", choices=["l2", "cosine", "ip"], help="default: the collection's space")
+    parser.add_argument("--max-neighbors", type=int, nargs="+", default=[8, 16, 32], help="HNSW M")
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    import chromadb
+
+    source = RetrievalService().collection(args.collection)
+    spaces = args.spaces or [((source.configuration or {}).get("hnsw") or {}).get("space", "l2")]
+    ids, vectors = load_vectors(source)
+
+    rng = random.Random(args.seed)
+    if args.collection == "nutrition_db":
+        query_texts = [query for query_set in food_query_sets(args.queries, rng) for query in query_set["queries"]]
+    else:
+        query_texts = qna_query_set(source, args.queries, rng)["queries"]
+    queries = np.asarray(default_embedding_cache().embed(query_texts), dtype=np.float32)
+    k = min(args.k, len(ids))
+    print(f"{args.collection}: {len(ids)} vectors, {len(queries)} queries, recall@{k} against exact search")
+
+    client = chromadb.EphemeralClient()
+    results = []
+    print(f"{'space':>6} {'M':>4} {'ef_con':>6} {'ef_search':>9} {'build s':>8} {'p50 ms':>7} {'p95 ms':>7} {'qps':>8} {'recall':>7}")
+    for space in spaces:
+        truth = exact_neighbours(ids, vectors, queries, k, space)
+        settings = itertools.product(args.max_neighbors, args.ef_construction, args.ef_search)
+        for max_neighbors, ef_construction, ef_search in settings:
+            hnsw = {
+                "space": space,
+                "max_neighbors": max_neighbors,
+                "ef_construction": ef_construction,
+                "ef_search": ef_search,
+            }
+            start = time.perf_counter()
+            index = build_index(client, ids, vectors, hnsw, DEFAULT_BATCH_SIZE)
+            build_seconds = time.perf_counter() - start
+            index.query(query_embeddings=queries[:1], n_results=k, include=[])  # warm up
+            result = {**hnsw, "build_seconds": build_seconds}
+            result.update(measure(index, queries, truth, k))
+            results.append(result)
+            print(
+                f"{space:>6} {max_neighbors:>4} {ef_construction:>6} {ef_search:>9} {build_seconds:>8.2f} "
+                f"{result['p50_ms']:>7.2f} {result['p95_ms']:>7.2f} {result['qps']:>8.1f} {result['recall']:>7.3f}"
+            )
+            client.delete_collection(index.name)
+
+    best = recommend(results, args.target_recall)
+    if best is None:
+        return
+    met = "meets" if best["recall"] >= args.target_recall else "misses"
+    print(
+        f"\nrecommended ({met} recall {args.target_recall}: {best['recall']:.3f} at p95 {best['p95_ms']:.2f} ms):"
+        f"\nCHROMA_HNSW_SPACE={best['space']}"
+        f"\nCHROMA_HNSW_M={best['max_neighbors']}"
+        f"\nCHROMA_HNSW_EF_CONSTRUCTION={best['ef_construction']}"
+        f"\nCHROMA_HNSW_EF_SEARCH={best['ef_search']}"
+        f"\nthen rebuild the collection with its setup script (ef_search alone is applied by an incremental setup)"
+    )
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"hnsw-{args.collection}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "collection": args.collection,
+                "k": k,
+                "target_recall": args.target_recall,
+                "results": results,
+                "recommended": best,
+            },
+            file,
+            indent=2,
+        )
+    print(f"results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
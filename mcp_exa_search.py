@@ -1,7 +1,11 @@
-import chromadb
-from agents import Agent, Runner, function_tool, trace
-from agents.mcp import MCPServerStreamableHttp
+from agents import Agent, ModelSettings, trace
+from utils.answer_cache import semantic_answer_cache
 from utils.app_config import AppConfig
+from utils.mcp_connection import exa_search_server
+from utils.nutrition_tools import calorie_batch_lookup_tool, calorie_lookup_tool, food_filter_tool, meal_calories_tool
+from utils.retrieval_service import RetrievalService
+from utils.streaming import run_and_print
+import argparse
 import asyncio
 import sys
 import contextlib
@@ -10,53 +14,9 @@ import io
 # load the environment
 config = AppConfig()
 
-chroma_client = chromadb.PersistentClient(path="chroma")
-nutrition_db = chroma_client.get_collection(name="nutrition_db")
-
-@function_tool
-def calorie_lookup_tool(query: str, max_results: int = 3) -> str:
-    """
-    Tool function for a RAG database to look up calorie information for specific food items, but not for meals.
-
-    Args:
-        query: The food item to look up.
-        max_results: The maximum number of results to return.
-
-    Returns:
-        A string containing the nutrition information.
-    """
-
-    results = nutrition_db.query(query_texts=[query], n_results=max_results)
-
-    if not results["documents"][0]:
-        return f"No nutrition information found for: {query}"
-
-    # Format results for the agent
-    formatted_results = []
-    for i, doc in enumerate(results["documents"][0]):
-        metadata = results["metadatas"][0][i]
-        food_item = metadata["food_item"].title() #title is built in method in string that capitalizes first letter of each word
-        calories = metadata["calories_per_100g"]
-        category = metadata["food_category"].title()
-
-        formatted_results.append(
-            f"{food_item} ({category}): {calories} calories per 100g"
-        )
-
-    return "Nutrition Information:\n" + "\n".join(formatted_results)
-
-
 # Exa Search MCP code comes here:
-exa_search_mcp = MCPServerStreamableHttp(
-    name="Exa Search MCP",
-    params={
-        "url": f"https://mcp.exa.ai/mcp?exaApiKey={config.get_exa_api_key()}",
-        "timeout": 30,
-    },
-    client_session_timeout_seconds=30,
-    cache_tools_list=True,
-    max_retry_attempts=1,
-)
+# one warm, self-reconnecting session shared by every agent run in the process
+exa_search_mcp = exa_search_server()
 
 #agent that has a tool and an mcp server
 calorie_agent_with_search = Agent(
@@ -71,11 +31,14 @@ calorie_agent_with_search = Agent(
         information of the ingredients to make sure the information you provide is consistent.
         2) Then, if necessary, use the calorie_lookup_tool to get the calorie information of the ingredients.
     * Even if you know the recipe of the meal, always use Exa Search to find the exact recipe and ingredients.
-    * Once you know the ingredients, use the calorie_lookup_tool to get the calorie information of the individual ingredients.
+    * Once you know the ingredients and their quantities for a single serving, get the calories of every ingredient and the total with a single call to the meal_calories_tool instead of looking them up one by one and adding them up yourself.
+    * If you only need calories per 100g of several food items, look them all up with a single call to the calorie_batch_lookup_tool.
     * If the query is about the meal, in your final output give a list of ingredients with their quantities and calories for a single serving. Also display the total calories.
+    * For questions that filter, rank or compare foods by their calories (e.g. lowest-calorie fruits), use the food_filter_tool.
     * Don't use the calorie_lookup_tool more than 10 times.
     """,
-    tools=[calorie_lookup_tool],
+    tools=[calorie_lookup_tool, calorie_batch_lookup_tool, food_filter_tool, meal_calories_tool],
+    model_settings=ModelSettings(parallel_tool_calls=True),
     mcp_servers = [exa_search_mcp]
 )
 
@@ -93,7 +56,11 @@ for an english break fast and then make a call to
 calories_lookup_tool for each ingredient , sums up total calories 
 and gives the final response. Wow that's awesome
 """
-async def main():
+async def main(stream: bool = False, answer_cache: bool = False):
+    cache = semantic_answer_cache() if answer_cache else None
+
+    # open chroma and load the embedding model before the first tool call
+    RetrievalService().warmup()
 
     # connect to mcp server
     await exa_search_mcp.connect()
@@ -106,29 +73,29 @@ async def main():
 
         print(f"Answering question1:{question1}")
 
-        result = await Runner.run(
-            calorie_agent_with_search,
-            question1
-        )
-        print(result.final_output)
+        await run_and_print(calorie_agent_with_search, question1, stream, answer_cache=cache)
 
     #This search will involve mcp
     with trace("Nutrition Assistant with MCP"):
         print(f"Answering question2:{question2}")
 
-        result = await Runner.run(
-            calorie_agent_with_search,
-            question2
-        )
-        print(result.final_output)
+        await run_and_print(calorie_agent_with_search, question2, stream, answer_cache=cache)
+
+    # disconnect from mcp server
+    await exa_search_mcp.cleanup()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stream", action="store_true", help="print the answer and tool calls as they happen")
+    parser.add_argument("--answer-cache", action="store_true", help="reuse the answer to a similar earlier question")
+    args = parser.parse_args()
+
     # Suppress the expected async cleanup warning from MCP client disconnection
     # This occurs when the cancel scope is exited in a different task than it was entered,
     # which is normal behavior for HTTP streaming connections and doesn't affect functionality.
     with contextlib.redirect_stderr(io.StringIO()):
         try:
-            asyncio.run(main())
+            asyncio.run(main(args.stream, args.answer_cache))
         except Exception as e:
             # Re-raise any unexpected errors
             raise
@@ -1,7 +1,14 @@
-import chromadb
-from agents import Agent, Runner, WebSearchTool, function_tool, trace
-from agents.mcp import MCPServerStreamableHttp
+from typing import Callable, List, Optional
+
+from agents import Agent, ModelSettings, RunConfig, Runner, WebSearchTool, trace
+from pydantic import BaseModel
+from utils.answer_cache import answer_with_cache, semantic_answer_cache
 from utils.app_config import AppConfig
+from utils.mcp_connection import exa_search_server
+from utils.nutrition_tools import calorie_batch_lookup_tool, calorie_lookup_tool, food_filter_tool, meal_calories_tool
+from utils.retrieval_service import RetrievalService
+from utils.streaming import run_and_print
+import argparse
 import asyncio
 import contextlib
 import io
@@ -9,52 +16,9 @@ import io
 # load the environment
 config = AppConfig()
 
-chroma_client = chromadb.PersistentClient(path="chroma")
-nutrition_db = chroma_client.get_collection(name="nutrition_db")
-
-@function_tool
-def calorie_lookup_tool(query: str, max_results: int = 3) -> str:
-    """
-    Tool function for a RAG database to look up calorie information for specific food items, but not for meals.
-
-    Args:
-        query: The food item to look up.
-        max_results: The maximum number of results to return.
-
-    Returns:
-        A string containing the nutrition information.
-    """
-
-    results = nutrition_db.query(query_texts=[query], n_results=max_results)
-
-    if not results["documents"][0]:
-        return f"No nutrition information found for: {query}"
-
-    # Format results for the agent
-    formatted_results = []
-    for i, doc in enumerate(results["documents"][0]):
-        metadata = results["metadatas"][0][i]
-        food_item = metadata["food_item"].title() #title is built in method in string that capitalizes first letter of each word
-        calories = metadata["calories_per_100g"]
-        category = metadata["food_category"].title()
-
-        formatted_results.append(
-            f"{food_item} ({category}): {calories} calories per 100g"
-        )
-
-    return "Nutrition Information:\n" + "\n".join(formatted_results)
-
 # Exa Search MCP code comes here:
-exa_search_mcp = MCPServerStreamableHttp(
-    name="Exa Search MCP",
-    params={
-        "url": f"https://mcp.exa.ai/mcp?exaApiKey={config.get_exa_api_key()}",
-        "timeout": 30,
-    },
-    client_session_timeout_seconds=30,
-    cache_tools_list=True,
-    max_retry_attempts=1,
-)
+# one warm, self-reconnecting session shared by every agent run in the process
+exa_search_mcp = exa_search_server()
 
 #1st Agent: Our "Calorie Agent"
 calorie_agent_with_search = Agent(
@@ -69,11 +33,14 @@ calorie_agent_with_search = Agent(
         information of the ingredients to make sure the information you provide is consistent.
         2) Then, if necessary, use the calorie_lookup_tool to get the calorie information of the ingredients.
     * Even if you know the recipe of the meal, always use Exa Search to find the exact recipe and ingredients.
-    * Once you know the ingredients, use the calorie_lookup_tool to get the calorie information of the individual ingredients.
+    * Once you know the ingredients and their quantities for a single serving, get the calories of every ingredient and the total with a single call to the meal_calories_tool instead of looking them up one by one and adding them up yourself.
+    * If you only need calories per 100g of several food items, look them all up with a single call to the calorie_batch_lookup_tool.
     * If the query is about the meal, in your final output give a list of ingredients with their quantities and calories for a single serving. Also display the total calories.
+    * For questions that filter, rank or compare foods by their calories (e.g. lowest-calorie fruits), use the food_filter_tool.
     * Don't use the calorie_lookup_tool more than 10 times.
     """,
-    tools=[calorie_lookup_tool],
+    tools=[calorie_lookup_tool, calorie_batch_lookup_tool, food_filter_tool, meal_calories_tool],
+    model_settings=ModelSettings(parallel_tool_calls=True),
     mcp_servers=[exa_search_mcp],
 )
 
@@ -134,26 +101,130 @@ breakfast_advisor = Agent(
     handoffs=[breakfast_price_checker_agent],
 )
 
-async def main():
+#Parallel mode: plan the meals first, then work out calories and prices of every
+#meal at the same time, so the answer takes as long as the slowest meal
+class BreakfastMeal(BaseModel):
+    name: str
+    why_healthy: str
+    ingredients: List[str]
+
+
+class BreakfastPlan(BaseModel):
+    meals: List[BreakfastMeal]
+
+
+breakfast_meal_planner_agent = healthy_breakfast_planner_agent.clone(
+    name="Breakfast Meal Planner",
+    instructions="""
+    * You are a helpful assistant that helps with healthy breakfast choices.
+    Given the user's preferences prompt, come up with different breakfast meals that are healthy and fit for a busy person.
+    * For each meal give its name, a sentence of why this is a healthy choice and
+      its ingredients with quantities for a single serving (e.g. "40g rolled oats").
+    """,
+    output_type=BreakfastPlan,
+)
+
+
+async def check_meal(meal: BreakfastMeal, run_config: Optional[RunConfig] = None) -> str:
+    """
+    Calories and prices for one meal, looked up by the two sub-agents concurrently.
+    """
+    ingredients = ", ".join(meal.ingredients)
+    calories, prices = await asyncio.gather(
+        Runner.run(
+            calorie_agent_with_search,
+            f"How many calories are in {meal.name}? Ingredients for one serving: {ingredients}",
+            run_config=run_config,
+        ),
+        Runner.run(
+            breakfast_price_checker_agent,
+            f"Meal: {meal.name}\nIngredients: {ingredients}\nFind the approximate price of each ingredient.",
+            run_config=run_config,
+        ),
+        return_exceptions=True,
+    )
+    for result in (calories, prices):
+        # cancellation and interrupts are BaseExceptions: pass them on instead of reporting them
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result
+
+    def section(title, result):
+        if isinstance(result, Exception):
+            return f"**{title}**\n_unavailable ({type(result).__name__}: {result})_"
+        return f"**{title}**\n{result.final_output}"
+
+    return "\n\n".join(
+        [f"## {meal.name}\n{meal.why_healthy}", section("Calories", calories), section("Prices", prices)]
+    )
+
+
+async def advise_breakfast_parallel(
+    user_query: str,
+    run_config: Optional[RunConfig] = None,
+    on_meal: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Same answer as the breakfast_advisor, but every meal is checked concurrently
+    instead of the advisor calling the tools and handing off one step at a time.
+    on_meal is called with each meal's section as soon as it is ready.
+    """
+    plan = await Runner.run(breakfast_meal_planner_agent, user_query, run_config=run_config)
+    meals = plan.final_output_as(BreakfastPlan).meals
+
+    async def checked(meal):
+        section = await check_meal(meal, run_config)
+        if on_meal is not None:
+            on_meal(section)
+        return section
+
+    sections = await asyncio.gather(*(checked(meal) for meal in meals))
+    return "\n\n".join(sections)
+
+
+async def main(parallel: bool = False, stream: bool = False, answer_cache: bool = False):
+    cache = semantic_answer_cache() if answer_cache else None
+
+    # open chroma and load the embedding model before the first tool call
+    RetrievalService().warmup()
 
     # connect to mcp server
     await exa_search_mcp.connect()
 
     user_query = "I'm a busy person and I want to eat healthy breakfasts. I like to eat oatmeal and eggs. What is a healthy breakfast for me? Give me two options."
-    with trace("Multi Agent: Breakfast Advisor"):
-      print(f"User Query:{user_query}")
-      result = await Runner.run(
-          breakfast_advisor,
-          user_query)
-      print(result.final_output)
+    if parallel:
+      with trace("Multi Agent: Breakfast Advisor (parallel)"):
+        print(f"User Query:{user_query}")
+        # meals print as they finish, fastest first
+        on_meal = (lambda section: print(section + "\n", flush=True)) if stream else None
+        answer, from_cache = await answer_with_cache(
+            cache, advise_breakfast_parallel.__name__, user_query,
+            lambda: advise_breakfast_parallel(user_query, on_meal=on_meal),
+        )
+        if from_cache or not stream:
+          print(answer)
+        if from_cache:
+          print("[answered from the answer cache]")
+    else:
+      with trace("Multi Agent: Breakfast Advisor"):
+        print(f"User Query:{user_query}")
+        await run_and_print(breakfast_advisor, user_query, stream, answer_cache=cache)
+
+    # disconnect from mcp server
+    await exa_search_mcp.cleanup()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parallel", action="store_true", help="check calories and prices of all meals concurrently")
+    parser.add_argument("--stream", action="store_true", help="print the answer and tool calls as they happen")
+    parser.add_argument("--answer-cache", action="store_true", help="reuse the answer to a similar earlier question")
+    args = parser.parse_args()
+
     # Suppress the expected async cleanup warning from MCP client disconnection
     # This occurs when the cancel scope is exited in a different task than it was entered,
     # which is normal behavior for HTTP streaming connections and doesn't affect functionality.
     with contextlib.redirect_stderr(io.StringIO()):
         try:
-            asyncio.run(main())
+            asyncio.run(main(args.parallel, args.stream, args.answer_cache))
         except Exception as e:
             # Re-raise any unexpected errors
             raise
@@ -1,13 +1,29 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import chromadb
 import pandas as pd
 
+from utils.app_config import hnsw_settings_from_env
+from utils.chroma_ingest import (
+    DEFAULT_BATCH_SIZE,
+    apply_hnsw_settings,
+    checkpoint_path_for,
+    effective_batch_size,
+    hnsw_configuration,
+    ingest_in_batches,
+    iter_records,
+    open_collection_for_ingest,
+    sync_collection,
+)
+from utils.embedding_cache import default_embedding_cache
+from utils.food_index import food_record_id
+
 
 def prepare_nutrition_documents(csv_path: str) -> Dict:
     """
     Convert nutrition CSV into ChromaDB-ready documents.
-    Each food item becomes a searchable document.
+    Each food item becomes a searchable document, with an id derived from its
+    name and category (see food_record_id) rather than its row number.
     """
     print("preparing nutrition documents")
 
@@ -16,8 +32,9 @@ def prepare_nutrition_documents(csv_path: str) -> Dict:
     documents = []
     metadatas = []
     ids = []
+    seen = {}
 
-    for index, row in df.iterrows():
+    for _, row in df.iterrows():
         # Create rich document text for semantic search
         row["Cals_per100grams"] = row["Cals_per100grams"].replace(" cal", "")
         row["KJ_per100grams"] = row["KJ_per100grams"].replace(" kJ", "")
@@ -53,44 +70,133 @@ def prepare_nutrition_documents(csv_path: str) -> Dict:
 
         documents.append(document_text)
         metadatas.append(metadata)
-        ids.append(f"food_{index}")
+        ids.append(food_record_id(row["FoodItem"], row["FoodCategory"], seen))
 
     return {"documents": documents, "metadatas": metadatas, "ids": ids}
 
 
-def setup_nutrition_chromadb(csv_path: str, collection_name: str = "nutrition_db"):
+def prepare_nutrition_documents_columnar(csv_path: str) -> Dict:
+    """
+    Columnar version of prepare_nutrition_documents.
+    Strips the " cal"/" kJ" suffixes and renders document text and metadata
+    with operations on whole columns instead of walking the rows one by one.
+    Produces exactly the same documents, metadatas and ids.
+    """
+    print("preparing nutrition documents (columnar)")
+
+    df = pd.read_csv(csv_path)
+
+    food_item = df["FoodItem"].astype(str)
+    food_category = df["FoodCategory"].astype(str)
+    serving_info = df["per100grams"].astype(str)
+    calories = df["Cals_per100grams"].astype(str).str.replace(" cal", "", regex=False)
+    kilojoules = df["KJ_per100grams"].astype(str).str.replace(" kJ", "", regex=False)
+
+    food_item_lower = food_item.str.lower()
+    food_category_lower = food_category.str.lower()
+
+    # Same layout as the f-string in prepare_nutrition_documents
+    documents = (
+        "Food: " + food_item
+        + "\n        Category: " + food_category
+        + "\n        Nutritional Information:"
+        + "\n        - Calories: " + calories + " per 100g"
+        + "\n        - Energy: " + kilojoules + " kJ per 100g"
+        + "\n        - Serving size reference: " + serving_info
+        + "\n\n        This is a " + food_category_lower
+        + " food item that provides " + calories + " calories per 100 grams."
+    ).str.strip()
+
+    metadata_columns = {
+        "food_item": food_item_lower,
+        "food_category": food_category_lower,
+        "calories_per_100g": pd.to_numeric(calories, errors="coerce").fillna(0).astype(float),
+        "kj_per_100g": pd.to_numeric(kilojoules, errors="coerce").fillna(0).astype(float),
+        "serving_info": df["per100grams"],
+        # Add searchable keywords
+        "keywords": (food_item_lower + " " + food_category_lower).str.replace(
+            " ", "_", regex=False
+        ),
+    }
+    # zip over plain lists is much cheaper than DataFrame.to_dict(orient="records")
+    keys = list(metadata_columns)
+    metadatas = [
+        dict(zip(keys, values))
+        for values in zip(*(column.tolist() for column in metadata_columns.values()))
+    ]
+
+    seen = {}
+    ids = [food_record_id(name, category, seen) for name, category in zip(food_item, food_category)]
+
+    return {"documents": documents.tolist(), "metadatas": metadatas, "ids": ids}
+
+
+def setup_nutrition_chromadb(
+    csv_path: str,
+    collection_name: str = "nutrition_db",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    resume: bool = True,
+    incremental: bool = False,
+    use_embedding_cache: bool = True,
+    hnsw: Optional[Dict] = None,
+):
     """
     Create and populate ChromaDB collection with nutrition data.
+    Documents are written in chunks of batch_size and progress is checkpointed,
+    so an interrupted run picks up from the last committed chunk when resume is True.
+    Embeddings come from the on-disk embedding cache unless use_embedding_cache is False.
+    With incremental=True the existing collection is kept and only new, changed
+    or removed food items are written.
+    hnsw sets the vector index (space, ef_construction, ef_search, max_neighbors);
+    it defaults to the CHROMA_HNSW_* environment settings.
     """
     print("Initialize chroma db...")
 
     # Initialize ChromaDB
     client = chromadb.PersistentClient(path="chroma")
-
-    # Create collection (delete if exists)
-    try:
-        print(" deleting existing collection")
-        client.delete_collection(collection_name)
-    except BaseException:
-        pass
-
-    collection = client.create_collection(
-        name=collection_name,
-        metadata={
-            "description": "Nutrition database with calorie and food information"
-        }
+    embedding_cache = default_embedding_cache() if use_embedding_cache else None
+    if hnsw is None:
+        hnsw = hnsw_settings_from_env()
+    collection_metadata = {
+        "description": "Nutrition database with calorie and food information"
+    }
+
+    if incremental:
+        collection = client.get_or_create_collection(
+            name=collection_name, metadata=collection_metadata, configuration=hnsw_configuration(hnsw)
+        )
+        apply_hnsw_settings(collection, hnsw)
+        data = prepare_nutrition_documents_columnar(csv_path)
+        sync_collection(
+            collection, iter_records(data), batch_size=effective_batch_size(client, batch_size),
+            embedding_cache=embedding_cache,
+        )
+        return collection
+
+    collection, checkpoint = open_collection_for_ingest(
+        client,
+        collection_name,
+        metadata=collection_metadata,
+        hnsw=hnsw,
+        source=csv_path,
+        resume=resume,
     )
 
     # Prepare documents
-    data = prepare_nutrition_documents(csv_path)
-
-    # Add to ChromaDB
-    collection.add(
-        documents=data["documents"], metadatas=data["metadatas"], ids=data["ids"]
+    data = prepare_nutrition_documents_columnar(csv_path)
+
+    # Add to ChromaDB in chunks
+    total = ingest_in_batches(
+        collection,
+        iter_records(data),
+        checkpoint_path=checkpoint_path_for(collection_name),
+        checkpoint=checkpoint,
+        batch_size=effective_batch_size(client, batch_size),
+        embedding_cache=embedding_cache,
     )
 
     print(
-        f"Added {len(data['documents'])} food items to ChromaDB collection '{collection_name}'"
+        f"Added {total} food items to ChromaDB collection '{collection_name}'"
     )
     return collection
 
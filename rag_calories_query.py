@@ -1,46 +1,15 @@
-from agents import Agent, ModelSettings, Runner, function_tool, trace
-import chromadb
+from agents import Agent, ModelSettings, trace
+from utils.answer_cache import semantic_answer_cache
 from utils.app_config import AppConfig
+from utils.nutrition_tools import calorie_batch_lookup_tool, calorie_lookup_tool, food_filter_tool, meal_calories_tool
+from utils.retrieval_service import RetrievalService
+from utils.streaming import run_and_print
+import argparse
 import asyncio
 
 # load the environment
 _ = AppConfig()
 
-chroma_client = chromadb.PersistentClient(path="chroma")
-nutrition_db = chroma_client.get_collection(name="nutrition_db")
-
-@function_tool
-def calorie_lookup_tool(query: str, max_results: int = 3) -> str:
-    """
-    Tool function for a RAG database to look up calorie information for specific food items, but not for meals.
-
-    Args:
-        query: The food item to look up.
-        max_results: The maximum number of results to return.
-
-    Returns:
-        A string containing the nutrition information.
-    """
-
-    results = nutrition_db.query(query_texts=[query], n_results=max_results)
-
-    if not results["documents"][0]:
-        return f"No nutrition information found for: {query}"
-
-    # Format results for the agent
-    formatted_results = []
-    for i, doc in enumerate(results["documents"][0]):
-        metadata = results["metadatas"][0][i]
-        food_item = metadata["food_item"].title()
-        calories = metadata["calories_per_100g"]
-        category = metadata["food_category"].title()
-
-        formatted_results.append(
-            f"{food_item} ({category}): {calories} calories per 100g"
-        )
-
-    return "Nutrition Information:\n" + "\n".join(formatted_results)
-
 #Create calorie agent with our tool. Optionally we could force the tool choice as well
 calorie_agent = Agent(
     name="Nutrition Assistant",
@@ -48,17 +17,27 @@ calorie_agent = Agent(
     You are a helpful nutrition assistant giving out calorie information.
     You give concise answers.
     If you need to look up calorie information, use the calorie_lookup_tool.
+    If you need calorie information for several food items, look them all up with a single call to the calorie_batch_lookup_tool.
+    For the calories of a meal whose ingredients and weights you know, use a single call to the meal_calories_tool; it also adds up the total.
+    For questions that filter, rank or compare foods by their calories (e.g. lowest-calorie fruits, foods under 50 calories), use the food_filter_tool.
     """,
-    tools=[calorie_lookup_tool]
+    tools=[calorie_lookup_tool, calorie_batch_lookup_tool, food_filter_tool, meal_calories_tool],
+    model_settings=ModelSettings(parallel_tool_calls=True),
 )
 
-async def main():
+async def main(stream: bool = False, answer_cache: bool = False):
+    cache = semantic_answer_cache() if answer_cache else None
+    # open chroma and load the embedding model before the first tool call
+    RetrievalService().warmup()
     with trace("Nutrition Assistant with tools"):
-        result = await Runner.run(
-            calorie_agent, "How many calories are in total in a banana and an apple?"
+        await run_and_print(
+            calorie_agent, "How many calories are in total in a banana and an apple?", stream, answer_cache=cache
         )
-        print(result.final_output)
 
 if __name__ == "__main__":
     #execute the agent
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stream", action="store_true", help="print the answer and tool calls as they happen")
+    parser.add_argument("--answer-cache", action="store_true", help="reuse the answer to a similar earlier question")
+    args = parser.parse_args()
+    asyncio.run(main(args.stream, args.answer_cache))
@@ -1,21 +1,64 @@
+import hashlib
+import itertools
+import multiprocessing
+import random
 import re
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import chromadb
-import pandas as pd
 from tqdm import tqdm #progress bar library that can show progress
 
+from utils.app_config import hnsw_settings_from_env
+from utils.chroma_ingest import (
+    DEFAULT_BATCH_SIZE,
+    apply_hnsw_settings,
+    checkpoint_path_for,
+    effective_batch_size,
+    hnsw_configuration,
+    ingest_in_batches,
+    load_checkpoint,
+    open_collection_for_ingest,
+    stable_record_id,
+    sync_collection,
+)
+from utils.embedding_cache import default_embedding_cache
+from utils.stage_timer import StageTimer
+
+
+def _question_key(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+def qa_record_id(question: str, seen: Dict[str, int]) -> str:
+    """
+    nutrition_qna id of a pair: a hash of its question (case and spacing ignored),
+    so ids survive pairs being added or removed elsewhere in the file.
+    """
+    return stable_record_id("qa", _question_key(question), seen)
+
+
+def in_sample(question: str, sample_percentage: float, seed: int) -> bool:
+    """
+    Bernoulli draw at sample_percentage for the pair with this question, made
+    from a hash of the question keyed by the seed. It needs no record count,
+    gives the same answer in every run with the same seed, and does not change
+    when other pairs are added or removed.
+    """
+    digest = hashlib.blake2b(
+        _question_key(question).encode("utf-8"), digest_size=8, key=str(seed).encode("utf-8")
+    ).digest()
+    return int.from_bytes(digest, "big") < sample_percentage * 2**64
+
 
 def parse_qa_pairs(
-    file_path: str, sample_percentage: float = 0.05
+    file_path: str, sample_percentage: float = 0.05, seed: Optional[int] = None
 ) -> List[Dict[str, str]]:
     """
     Parse Q&A pairs from the questions_output.txt file.
     Each Q&A pair becomes a separate document.
     Only processes a sample percentage of the data for faster execution.
+    Passing a seed makes the sample reproducible.
     """
-    import random
-
     qa_pairs = []
 
     with open(file_path, "r", encoding="utf-8") as file:
@@ -35,10 +78,11 @@ def parse_qa_pairs(
     valid_pairs = [p for p in pairs if p.strip()]
 
     # Randomly sample pairs
-    sampled_pairs = random.sample(valid_pairs, min(sample_size, len(valid_pairs)))
+    sampled_pairs = random.Random(seed).sample(valid_pairs, min(sample_size, len(valid_pairs)))
 
     # Process pairs with progress bar
-    for i, pair in enumerate(tqdm(sampled_pairs, desc="Parsing Q&A pairs")):
+    seen = {}
+    for pair in tqdm(sampled_pairs, desc="Parsing Q&A pairs"):
         lines = pair.strip().split("\n")
 
         question = ""
@@ -51,53 +95,169 @@ def parse_qa_pairs(
                 answer = line.replace("Answer:", "").strip()
 
         if question and answer:
-            qa_pairs.append({"question": question, "answer": answer, "id": f"qa_{i}"})
+            qa_pairs.append({"question": question, "answer": answer, "id": qa_record_id(question, seen)})
 
     return qa_pairs
 
 
-def prepare_nutrition_qa_documents(
-        file_path: str, sample_percentage: float = 0.05
-) -> Dict:
+def iter_qa_records(file_path: str) -> Iterator[str]:
     """
-    Convert Q&A pairs into ChromaDB-ready documents.
-    Each Q&A pair becomes a searchable document.
+    Stream the raw Q&A records of a questions_output.txt style file.
+    Records are separated by an empty line, like content.split("\n\n"),
+    but only one record is held in memory at a time.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        lines = []
+        for line in file:
+            if line == "\n":
+                record = "".join(lines)
+                lines = []
+                if record.strip():
+                    yield record
+            else:
+                lines.append(line)
+        record = "".join(lines)
+        if record.strip():
+            yield record
+
+
+def parse_qa_record(record: str) -> Tuple[str, str]:
     """
-    qa_pairs = parse_qa_pairs(file_path, sample_percentage)
+    Extract the question and answer lines of one raw record.
+    """
+    question = ""
+    answer = ""
+
+    for line in record.strip().split("\n"):
+        if line.startswith("Question:"):
+            question = line.replace("Question:", "").strip()
+        elif line.startswith("Answer:"):
+            answer = line.replace("Answer:", "").strip()
+
+    return question, answer
 
-    documents = []
-    metadatas = []
-    ids = []
 
-    # Process Q&A pairs with progress bar
-    for qa in tqdm(qa_pairs, desc="Preparing documents"):
-        # Create rich document text for semantic search
-        document_text = f"""
+def iter_qa_pairs(
+    file_path: str, sample_percentage: float = 0.05, seed: Optional[int] = None
+) -> Iterator[Dict[str, str]]:
+    """
+    Streaming version of parse_qa_pairs.
+    The file is read once, record by record, and every pair is kept or dropped
+    on its own (see in_sample), so memory stays flat and no record count is
+    needed; the sample holds about sample_percentage of the pairs. Without a
+    seed a random one is drawn. At 100% sampling every pair is kept.
+    """
+    if sample_percentage >= 1:
+        print("Streaming all Q&A pairs")
+    else:
+        print(f"Sampling about {sample_percentage*100:.1f}% of the Q&A pairs")
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    seen = {}
+    for record in iter_qa_records(file_path):
+        question, answer = parse_qa_record(record)
+        if not (question and answer):
+            continue
+        if sample_percentage < 1 and not in_sample(question, sample_percentage, seed):
+            continue
+        yield {"question": question, "answer": answer, "id": qa_record_id(question, seen)}
+
+
+def build_qa_record(qa: Dict[str, str]) -> Tuple[str, str, Dict]:
+    """
+    Render one Q&A pair as an (id, document, metadata) record.
+    """
+    # Create rich document text for semantic search
+    document_text = f"""
         Question: {qa['question']}
         Answer: {qa['answer']}
 
         This Q&A pair provides information about nutrition and health topics.
         """.strip()
 
-        # Extract keywords from question for better searchability
-        question_words = re.findall(r"\b\w+\b", qa["question"].lower())
-        answer_words = re.findall(r"\b\w+\b", qa["answer"].lower())
-        all_words = question_words + answer_words
-
-        # Create metadata for filtering and exact lookups
-        metadata = {
-            "question": qa["question"],
-            "answer": qa["answer"],
-            "question_length": len(qa["question"]),
-            "answer_length": len(qa["answer"]),
-            "keywords": " ".join(set(all_words)),
-            "has_question_mark": "?" in qa["question"],
-            "topic": "nutrition_qa",
-        }
+    # Extract keywords from question for better searchability
+    question_words = re.findall(r"\b\w+\b", qa["question"].lower())
+    answer_words = re.findall(r"\b\w+\b", qa["answer"].lower())
+    all_words = question_words + answer_words
+
+    # Create metadata for filtering and exact lookups
+    metadata = {
+        "question": qa["question"],
+        "answer": qa["answer"],
+        "question_length": len(qa["question"]),
+        "answer_length": len(qa["answer"]),
+        # dict.fromkeys keeps first-seen order, so the text (and its content hash) is stable across runs
+        "keywords": " ".join(dict.fromkeys(all_words)),
+        "has_question_mark": "?" in qa["question"],
+        "topic": "nutrition_qa",
+    }
+
+    return qa["id"], document_text, metadata
+
+
+def _build_qa_records_parallel(
+    qa_pairs: Iterable[Dict[str, str]], workers: int, chunksize: int
+) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Build records on a process pool. Pairs are handed over in bounded windows
+    (Pool.imap would otherwise drain the whole input up front), and imap keeps
+    every window in input order, so ids and ordering match the single-process run.
+    """
+    qa_pairs = iter(qa_pairs)
+    window_size = workers * chunksize * 4
+    with multiprocessing.Pool(workers) as pool:
+        while window := list(itertools.islice(qa_pairs, window_size)):
+            yield from pool.imap(build_qa_record, window, chunksize)
+
+
+def iter_nutrition_qa_records(
+    file_path: str,
+    sample_percentage: float = 0.05,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    chunksize: int = 256,
+    timer: Optional[StageTimer] = None,
+) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Stream ChromaDB-ready (id, document, metadata) records straight from the Q&A file.
+    With workers > 1 the documents are built on a process pool of that size.
+    Time spent parsing and preparing is recorded on timer if one is given.
+    """
+    timer = timer or StageTimer()
+    qa_pairs = timer.timed_iter("parse", iter_qa_pairs(file_path, sample_percentage, seed))
+
+    if workers > 1:
+        records = _build_qa_records_parallel(qa_pairs, workers, chunksize)
+    else:
+        records = map(build_qa_record, qa_pairs)
+
+    yield from tqdm(timer.timed_iter("prepare", records), desc="Preparing documents")
+
+
+def prepare_nutrition_qa_documents(
+        file_path: str,
+        sample_percentage: float = 0.05,
+        seed: Optional[int] = None,
+        workers: int = 1,
+) -> Dict:
+    """
+    Convert Q&A pairs into ChromaDB-ready documents.
+    Each Q&A pair becomes a searchable document.
+    """
+    timer = StageTimer()
+    documents = []
+    metadatas = []
+    ids = []
 
+    for record_id, document_text, metadata in iter_nutrition_qa_records(
+        file_path, sample_percentage, seed, workers=workers, timer=timer
+    ):
         documents.append(document_text)
         metadatas.append(metadata)
-        ids.append(qa["id"])
+        ids.append(record_id)
+
+    print(timer.report())
 
     return {"documents": documents, "metadatas": metadatas, "ids": ids}
 
@@ -105,37 +265,103 @@ def setup_nutrition_qa_chromadb(
     file_path: str,
     collection_name: str = "nutrition_qna",
     sample_percentage: float = 0.05,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    resume: bool = True,
+    incremental: bool = False,
+    use_embedding_cache: bool = True,
+    seed: Optional[int] = None,
+    workers: int = 1,
+    hnsw: Optional[Dict] = None,
 ):
     """
     Create and populate ChromaDB collection with nutrition Q&A data.
+    Documents are written in chunks of batch_size and progress is checkpointed.
+    An interrupted run is resumed only with the same file, sample_percentage and
+    seed; without a seed it reuses the seed of the interrupted run so it sees the
+    same pairs. Anything else starts over.
+    Embeddings come from the on-disk embedding cache unless use_embedding_cache is False.
+    With incremental=True the existing collection is kept and only new, changed
+    or removed pairs are written; the sample seed stored on the collection is
+    reused unless a seed is given. A collection without a stored seed needs a
+    full setup or an explicit seed, since any other seed samples different pairs.
+    hnsw sets the vector index (space, ef_construction, ef_search, max_neighbors);
+    it defaults to the CHROMA_HNSW_* environment settings.
+    workers > 1 builds the documents on a process pool; a per-stage timing
+    breakdown (parse, prepare, ingest) is printed at the end.
     """
     # Initialize ChromaDB
     client = chromadb.PersistentClient(path="chroma")
-
-    # Create collection (delete if exists)
-    try:
-        client.delete_collection(collection_name)
-    except:
-        pass
-
-    collection = client.create_collection(
-        name=collection_name,
-        metadata={
-            "description": "Nutrition Q&A database with questions and answers about nutrition and health"
-        },
+    embedding_cache = default_embedding_cache() if use_embedding_cache else None
+    if hnsw is None:
+        hnsw = hnsw_settings_from_env()
+
+    timer = StageTimer()
+
+    if seed is None and resume and not incremental:
+        seed = (load_checkpoint(checkpoint_path_for(collection_name)) or {}).get("seed")
+    new_seed = seed if seed is not None else random.randrange(2**32)
+    collection_metadata = {
+        "description": "Nutrition Q&A database with questions and answers about nutrition and health",
+        "sample_seed": new_seed,
+    }
+
+    if incremental:
+        collection = client.get_or_create_collection(
+            name=collection_name, metadata=collection_metadata, configuration=hnsw_configuration(hnsw)
+        )
+        apply_hnsw_settings(collection, hnsw)
+        if seed is None:
+            seed = (collection.metadata or {}).get("sample_seed")
+            if seed is None:
+                # another seed would draw another sample and rewrite the whole collection
+                raise ValueError(
+                    f"Collection '{collection_name}' has no sample_seed; run a full setup "
+                    "(incremental=False) or pass the seed it was sampled with"
+                )
+        with timer.stage("ingest"):
+            sync_collection(
+                collection,
+                iter_nutrition_qa_records(
+                    file_path, sample_percentage, seed, workers=workers, timer=timer
+                ),
+                batch_size=effective_batch_size(client, batch_size),
+                embedding_cache=embedding_cache,
+            )
+        print(timer.report())
+        return collection
+
+    collection, checkpoint = open_collection_for_ingest(
+        client,
+        collection_name,
+        metadata=collection_metadata,
+        hnsw=hnsw,
+        source=file_path,
+        resume=resume,
+        seed=new_seed,
+        sample_percentage=sample_percentage,
     )
 
-    # Prepare documents
-    data = prepare_nutrition_qa_documents(file_path, sample_percentage)
-
-    # Add to ChromaDB with progress bar
+    # Stream documents into ChromaDB in chunks
     print("Adding documents to ChromaDB...")
-    collection.add(
-        documents=data["documents"], metadatas=data["metadatas"], ids=data["ids"]
-    )
+    with timer.stage("ingest"):
+        total = ingest_in_batches(
+            collection,
+            iter_nutrition_qa_records(
+                file_path,
+                sample_percentage,
+                new_seed,
+                workers=workers,
+                timer=timer,
+            ),
+            checkpoint_path=checkpoint_path_for(collection_name),
+            checkpoint=checkpoint,
+            batch_size=effective_batch_size(client, batch_size),
+            embedding_cache=embedding_cache,
+        )
+    print(timer.report())
 
     print(
-        f"Added {len(data['documents'])} Q&A pairs to ChromaDB collection '{collection_name}'"
+        f"Added {total} Q&A pairs to ChromaDB collection '{collection_name}'"
     )
     return collection
 
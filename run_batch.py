@@ -0,0 +1,157 @@
+"""
+Run many questions concurrently against one of the nutrition agents.
+
+Questions come from a JSONL file (or stdin with --input -), one
+{"id": ..., "question": ...} object or plain question per line.
+Results are written as JSONL as they complete, followed by a summary with
+latency percentiles on stderr.
+
+Examples:
+    python run_batch.py --agent calorie_agent --input questions.jsonl --concurrency 8
+    cat questions.jsonl | python run_batch.py --agent breakfast_advisor --input - --timeout 180
+
+With --fake-model the agents answer from a scripts file instead of OpenAI,
+so the pipeline can be load tested offline and for free:
+    python run_batch.py --agent calorie_agent --input questions.jsonl \
+        --fake-model benchmarks/fake_model/calorie_agent.json --fake-latency 0.8
+
+--metrics-out writes the tool, retrieval stage, MCP and agent run latency
+histograms and the hit/miss counts of every cache (see utils/metrics.py) as
+Prometheus text (.prom) or JSON, and
+--profile saves a cProfile of the run:
+    python run_batch.py --agent calorie_agent --input questions.jsonl \
+        --metrics-out metrics/calorie_agent.prom --profile metrics/calorie_agent.pstats
+
+--answer-cache answers questions similar to ones answered before (also in
+earlier runs) from the answer_cache collection instead of running the agent:
+    python run_batch.py --agent calorie_agent --input questions.jsonl --answer-cache --answer-cache-threshold 0.95
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import sys
+
+from utils.answer_cache import DEFAULT_THRESHOLD, DEFAULT_TTL_SECONDS, semantic_answer_cache
+from utils.batch_runner import read_questions, run_batch
+from utils.calorie_lookup import calorie_lookup_cache
+from utils.embedding_cache import default_embedding_cache
+from utils.metrics import metrics, profiled
+from utils.result_formatter import token_savings
+from utils.search_cache import search_response_cache
+
+# agent name -> (module, agent or workflow function attribute, MCP server attribute or None)
+AGENTS = {
+    "calorie_agent": ("rag_calories_query", "calorie_agent", None),
+    "calorie_agent_with_search": ("mcp_exa_search", "calorie_agent_with_search", "exa_search_mcp"),
+    "breakfast_advisor": ("multi_agent", "breakfast_advisor", "exa_search_mcp"),
+    "breakfast_advisor_parallel": ("multi_agent", "advise_breakfast_parallel", "exa_search_mcp"),
+}
+
+
+async def main(args):
+    module_name, agent_name, mcp_name = AGENTS[args.agent]
+    if args.fake_model:
+        # no OpenAI calls are made, but AppConfig insists on a key
+        os.environ.setdefault("OPENAI_API_KEY", "offline")
+    module = importlib.import_module(module_name)
+    agent = getattr(module, agent_name)
+
+    run_config = None
+    if args.fake_model:
+        from agents import Agent, RunConfig
+        from utils.fake_model import install_scripted_model, load_scripts
+
+        # every agent in the module, including the ones only used through as_tool
+        module_agents = [value for value in vars(module).values() if isinstance(value, Agent)]
+        provider = install_scripted_model(
+            module_agents,
+            load_scripts(args.fake_model),
+            latency=args.fake_latency,
+            jitter=args.fake_jitter,
+            seed=args.seed,
+        )
+        run_config = RunConfig(model_provider=provider, tracing_disabled=True)
+
+    from utils.retrieval_service import RetrievalService
+
+    RetrievalService().warmup()
+
+    answer_cache = None
+    if args.answer_cache:
+        answer_cache = semantic_answer_cache()
+        answer_cache.threshold = args.answer_cache_threshold
+        answer_cache.ttl_seconds = args.answer_cache_ttl
+
+    # one MCP connection shared by every concurrent run
+    mcp_server = getattr(module, mcp_name) if mcp_name else None
+    if mcp_server is not None:
+        await mcp_server.connect()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    input_stream = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+
+    def write_result(result):
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    try:
+        summary = await run_batch(
+            agent,
+            read_questions(input_stream),
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            on_result=write_result,
+            run_config=run_config,
+            stream=args.stream,
+            answer_cache=answer_cache,
+        )
+    finally:
+        if mcp_server is not None:
+            with contextlib.suppress(Exception):
+                await mcp_server.cleanup()
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output is not sys.stdout:
+            output.close()
+
+    cache_stats = {
+        "calorie_lookup_cache": calorie_lookup_cache.stats(),
+        "embedding_cache": default_embedding_cache().stats(),
+        "search_cache": search_response_cache().stats(),
+    }
+    if answer_cache is not None:
+        cache_stats["answer_cache"] = answer_cache.stats()
+    for cache, stats in cache_stats.items():
+        metrics().record_cache_stats(cache, stats)
+    summary.update(cache_stats)
+    summary["tool_result_tokens"] = token_savings().stats()
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    if args.metrics_out:
+        metrics().write(args.metrics_out)
+        print(f"metrics written to {args.metrics_out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agent", choices=sorted(AGENTS), default="calorie_agent")
+    parser.add_argument("--input", required=True, help="JSONL file with questions, or - for stdin")
+    parser.add_argument("--output", help="where to write JSONL results (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum runs in flight")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per question")
+    parser.add_argument("--stream", action="store_true", help="stream each run and report time to first token")
+    parser.add_argument("--fake-model", help="scripts JSON for the offline scripted model (see utils/fake_model.py)")
+    parser.add_argument("--fake-latency", type=float, default=0.5, help="simulated seconds per model call")
+    parser.add_argument("--fake-jitter", type=float, default=0.0, help="extra random seconds per model call")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the simulated jitter")
+    parser.add_argument("--answer-cache", action="store_true", help="answer similar questions from earlier answers")
+    parser.add_argument("--answer-cache-threshold", type=float, default=DEFAULT_THRESHOLD, help="cosine similarity for a hit")
+    parser.add_argument("--answer-cache-ttl", type=float, default=DEFAULT_TTL_SECONDS, help="seconds a cached answer stays valid")
+    parser.add_argument("--metrics-out", help="write latency histograms here (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--profile", help="cProfile the run and save the stats here")
+    args = parser.parse_args()
+    with profiled(args.profile) if args.profile else contextlib.nullcontext():
+        asyncio.run(main(args))
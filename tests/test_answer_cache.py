@@ -0,0 +1,88 @@
+import chromadb
+import numpy as np
+import pytest
+
+from utils import answer_cache as answer_cache_module
+from utils.answer_cache import SemanticAnswerCache, question_signature
+from utils.food_index import FoodNameIndex
+
+FOODS = ["chicken breast", "banana", "apple", "pear", "egg"]
+
+
+class ConstantEmbeddings:
+    """
+    Every question embeds to the same vector, so only the signature, agent and
+    age of an entry decide whether it is a hit.
+    """
+
+    def embed(self, texts):
+        return [np.ones(8, dtype=np.float32) for _ in texts]
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    index = FoodNameIndex([{"food_item": name, "food_category": "test"} for name in FOODS])
+    monkeypatch.setattr(answer_cache_module, "food_name_index", lambda: index)
+    monkeypatch.setattr(answer_cache_module, "default_embedding_cache", ConstantEmbeddings)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticAnswerCache(client=chromadb.PersistentClient(path=str(tmp_path)), max_entries=3)
+
+
+def test_signature_keeps_numbers_in_order_and_foods_as_a_set():
+    assert question_signature("How many calories in 100g of Chicken Breasts?") == "100|breast chicken"
+    assert question_signature("a banana and an apple") == question_signature("an apple and a banana")
+    assert question_signature("two eggs") == "2|egg"
+
+
+def test_hit_for_the_same_question_reworded(cache):
+    cache.put("calories", "How many calories are in a banana and an apple?", "about 141 kcal")
+
+    assert cache.get("calories", "calories of an apple and a banana") == ("about 141 kcal", pytest.approx(1.0))
+    assert cache.stats()["hits"] == 1
+
+
+def test_miss_when_an_amount_differs(cache):
+    cache.put("calories", "calories in 100g of chicken breast", "165 kcal")
+
+    assert cache.get("calories", "calories in 200g of chicken breast") is None
+    assert cache.get("calories", "calories in 100g of chicken breast") is not None
+
+
+def test_miss_when_a_food_differs(cache):
+    cache.put("calories", "calories in a banana and an apple", "141 kcal")
+
+    assert cache.get("calories", "calories in a banana and a pear") is None
+
+
+def test_entries_are_scoped_per_agent(cache):
+    cache.put("calories", "calories in an egg", "78 kcal")
+
+    assert cache.get("breakfast", "calories in an egg") is None
+    assert cache.get("calories", "calories in an egg") is not None
+
+
+def test_expired_entries_are_deleted_on_lookup(cache):
+    cache.put("calories", "calories in an egg", "78 kcal")
+    cache.ttl_seconds = 0
+
+    assert cache.get("calories", "calories in an egg") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.collection.count() == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    questions = [f"calories in {grams}g of banana" for grams in (100, 200, 300)]
+    for question in questions:
+        cache.put("calories", question, question)
+    cache.get("calories", questions[0])  # 200g is now the least recently used
+
+    cache.put("calories", "calories in 400g of banana", "400g")
+
+    assert cache.collection.count() <= 3
+    assert cache.stats()["evictions"] >= 1
+    assert cache.get("calories", questions[1]) is None
+    assert cache.get("calories", questions[0]) is not None
+    assert cache.get("calories", "calories in 400g of banana") is not None
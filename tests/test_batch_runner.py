@@ -0,0 +1,40 @@
+import asyncio
+import io
+
+from utils.batch_runner import read_questions, run_batch
+
+
+async def shout(question, run_config=None):
+    return question.upper()
+
+
+def run(lines):
+    results = []
+    summary = asyncio.run(
+        asyncio.wait_for(run_batch(shout, read_questions(io.StringIO(lines)), concurrency=2, on_result=results.append), 10)
+    )
+    return summary, {result["id"]: result for result in results}
+
+
+def test_answers_json_and_plain_lines():
+    summary, results = run('{"id": "a", "question": "hi"}\nplain question\n')
+
+    assert results["a"]["output"] == "HI"
+    assert results[2]["output"] == "PLAIN QUESTION"
+    assert summary["ok"] == 2
+
+
+def test_malformed_lines_become_error_results():
+    lines = '{"id": 1, "question": "fine"}\n{"id": 2, "question": \n{"id": 3}\n{"id": 4, "question": "also fine"}\n'
+
+    summary, results = run(lines)
+
+    assert {record_id: result["status"] for record_id, result in results.items()} == {
+        1: "ok",
+        2: "error",
+        3: "error",
+        4: "ok",
+    }
+    assert results[2]["output"].startswith("JSONDecodeError")
+    assert "question" in results[3]["output"]
+    assert summary["requests"] == 4 and summary["errors"] == 2
@@ -0,0 +1,102 @@
+import pytest
+
+from utils import calorie_lookup
+from utils.food_index import FoodNameIndex
+from utils.food_table import FoodTable
+
+ROWS = [
+    {"food_item": "egg", "food_category": "bakingingredients", "calories_per_100g": 97.0, "kj_per_100g": 407.0},
+    {"food_item": "banana", "food_category": "fruits", "calories_per_100g": 89.0, "kj_per_100g": 374.0},
+    {"food_item": "whole milk", "food_category": "milk&dairyproducts", "calories_per_100g": 64.0, "kj_per_100g": 269.0},
+]
+
+
+class NoVectorSearch:
+    name = "nutrition_db"
+
+    def query(self, **kwargs):
+        raise AssertionError("every food here is known to the name index")
+
+
+@pytest.fixture(autouse=True)
+def small_name_index(monkeypatch):
+    index = FoodNameIndex(ROWS)
+    monkeypatch.setattr(calorie_lookup, "food_name_index", lambda: index)
+    calorie_lookup.calorie_lookup_cache.invalidate()
+    yield
+    calorie_lookup.calorie_lookup_cache.invalidate()
+
+
+def test_batch_lookup_answers_each_normalized_item_once():
+    output = calorie_lookup.lookup_calories_batch(NoVectorSearch(), ["Egg", "egg", " EGG ", "banana"])
+
+    sections = output.split("\n\n")
+    assert [section.split("\n")[0] for section in sections] == ["Egg:", "banana:"]
+    assert "Egg (Bakingingredients): 97 calories per 100g" in sections[0]
+
+
+def test_resolve_foods_searches_only_unknown_names(monkeypatch):
+    searched = []
+
+    def fake_hybrid_query(collection, texts, n_results, mode):
+        searched.extend(texts)
+        return {"metadatas": [[ROWS[2]] if text == "milk" else [] for text in texts]}
+
+    monkeypatch.setattr(calorie_lookup, "hybrid_query", fake_hybrid_query)
+
+    rows = calorie_lookup.resolve_foods(NoVectorSearch(), ["bananas", "milk", "dragon fruit"])
+
+    assert searched == ["milk", "dragon fruit"]
+    assert [row["food_item"] if row else None for row in rows] == ["banana", "whole milk", None]
+
+
+def test_typos_prefer_vector_search_and_fall_back_to_trigrams(monkeypatch):
+    found = {"bananna": [], "wole milk": [ROWS[0]]}
+    monkeypatch.setattr(
+        calorie_lookup, "hybrid_query",
+        lambda collection, texts, n_results, mode: {"metadatas": [found[text] for text in texts]},
+    )
+
+    rows = calorie_lookup.resolve_foods(NoVectorSearch(), ["bananna", "wole milk"])
+
+    # "wole milk" is spelled like "whole milk", but vector search found something, so that wins
+    assert [row["food_item"] for row in rows] == ["banana", "egg"]
+
+
+def test_meal_calories_per_ingredient_and_total(monkeypatch):
+    monkeypatch.setattr(
+        calorie_lookup, "hybrid_query", lambda collection, texts, n_results, mode: {"metadatas": [[] for _ in texts]}
+    )
+
+    table = calorie_lookup.lookup_meal_calories(NoVectorSearch(), [("banana", 120), ("egg", 50), ("unicorn", 30)])
+
+    assert table.split("\n") == [
+        "ingredient | matched food | grams | kcal | kJ",
+        "banana | Banana | 120 | 107 | 449",
+        "egg | Egg | 50 | 48 | 204",
+        "unicorn | not found | 30 | - | -",
+        "total | | 170 | 155 | 652",
+        "ingredients not found are left out of the total",
+    ]
+
+
+def test_meal_without_ingredients():
+    assert calorie_lookup.lookup_meal_calories(NoVectorSearch(), []) == "No ingredients given"
+
+
+@pytest.mark.parametrize("limit, expected", [(500, 50), (0, 1), (-3, 1), (7, 7)])
+def test_lookup_foods_clamps_the_limit_on_both_paths(monkeypatch, limit, expected):
+    requested = []
+
+    def fake_query_with_cache(collection, query_texts, n_results, where=None):
+        requested.append(n_results)
+        return {"metadatas": [ROWS[:n_results]]}
+
+    monkeypatch.setattr(calorie_lookup, "query_with_cache", fake_query_with_cache)
+    monkeypatch.setattr(calorie_lookup, "food_table", lambda: FoodTable(ROWS * 30))
+
+    calorie_lookup.lookup_foods(NoVectorSearch(), query="breakfast", limit=limit)
+    listed = calorie_lookup.lookup_foods(NoVectorSearch(), limit=limit)
+
+    assert requested == [expected]
+    assert len(listed.split("\n")) - 1 == expected
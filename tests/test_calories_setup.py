@@ -0,0 +1,29 @@
+from rag_calories_data_setup import prepare_nutrition_documents, prepare_nutrition_documents_columnar
+
+HEADER = "FoodCategory,FoodItem,per100grams,Cals_per100grams,KJ_per100grams\n"
+ROWS = [
+    "Fruits,Apple,100g,52 cal,218 kJ\n",
+    "Fruits,Banana,100g,89 cal,372 kJ\n",
+    "Fruits,Banana,100g,90 cal,376 kJ\n",
+]
+
+
+def _write(tmp_path, rows):
+    path = tmp_path / "calories.csv"
+    path.write_text(HEADER + "".join(rows))
+    return str(path)
+
+
+def test_ids_do_not_depend_on_row_position(tmp_path):
+    before = prepare_nutrition_documents_columnar(_write(tmp_path, ROWS))["ids"]
+    inserted = ["Vegetables,Carrot,100g,41 cal,173 kJ\n"] + ROWS
+    after = prepare_nutrition_documents_columnar(_write(tmp_path, inserted))["ids"]
+
+    assert after[1:] == before
+    assert len(set(before)) == len(before)  # the repeated banana still gets its own id
+
+
+def test_row_and_columnar_builders_agree_on_ids(tmp_path):
+    path = _write(tmp_path, ROWS)
+
+    assert prepare_nutrition_documents(path)["ids"] == prepare_nutrition_documents_columnar(path)["ids"]
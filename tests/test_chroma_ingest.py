@@ -0,0 +1,56 @@
+import os
+
+import chromadb
+
+from utils.chroma_ingest import checkpoint_path_for, open_collection_for_ingest, save_checkpoint
+
+
+def _open(client, source, **fields):
+    return open_collection_for_ingest(client, "ingest_test", metadata={"kind": "test"}, source=source, **fields)
+
+
+def _interrupt(checkpoint, committed=3):
+    save_checkpoint(checkpoint_path_for("ingest_test"), {**checkpoint, "committed": committed})
+
+
+def test_checkpoint_resumed_for_unchanged_source_and_fields(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "qa.txt"
+    source.write_text("Question: a\nAnswer: b\n")
+    client = chromadb.PersistentClient(str(tmp_path / "db"))
+
+    _, checkpoint = _open(client, str(source), seed=1, sample_percentage=0.5)
+    _interrupt(checkpoint)
+
+    _, resumed = _open(client, str(source), seed=1, sample_percentage=0.5)
+    assert resumed["committed"] == 3
+
+
+def test_checkpoint_discarded_when_source_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "qa.txt"
+    source.write_text("Question: a\nAnswer: b\n")
+    client = chromadb.PersistentClient(str(tmp_path / "db"))
+
+    _, checkpoint = _open(client, str(source), seed=1)
+    _interrupt(checkpoint)
+    source.write_text("Question: a\nAnswer: b\n\nQuestion: c\nAnswer: d\n")
+    os.utime(source, ns=(checkpoint["source_mtime_ns"] + 10**9,) * 2)
+
+    _, fresh = _open(client, str(source), seed=1)
+    assert fresh["committed"] == 0
+    assert fresh["source_size"] == source.stat().st_size
+
+
+def test_checkpoint_discarded_when_sampling_changes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "qa.txt"
+    source.write_text("Question: a\nAnswer: b\n")
+    client = chromadb.PersistentClient(str(tmp_path / "db"))
+
+    _, checkpoint = _open(client, str(source), seed=1, sample_percentage=0.5)
+    _interrupt(checkpoint)
+
+    _, fresh = _open(client, str(source), seed=1, sample_percentage=0.25)
+    assert fresh["committed"] == 0
+    assert fresh["sample_percentage"] == 0.25
@@ -0,0 +1,70 @@
+import numpy as np
+
+from utils.embedding_cache import EmbeddingCache
+
+
+class CountingEmbedder:
+    """
+    Deterministic 4-dimensional vectors that remember which texts were embedded.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [np.array([len(text), ord(text[0]), ord(text[-1]), 1.0], dtype=np.float32) for text in texts]
+
+
+def make_cache(tmp_path, max_entries=4):
+    embedder = CountingEmbedder()
+    cache = EmbeddingCache(
+        directory=str(tmp_path), model_name="test-model", max_entries=max_entries, embedding_function=embedder
+    )
+    return cache, embedder
+
+
+def test_round_trip_embeds_each_text_once(tmp_path):
+    cache, embedder = make_cache(tmp_path)
+
+    first = cache.embed(["apple", "banana"])
+    second = cache.embed(["banana", "apple", "cherry"])
+
+    assert embedder.calls == [["apple", "banana"], ["cherry"]]
+    np.testing.assert_array_equal(first[0], second[1])
+    np.testing.assert_array_equal(first[1], second[0])
+    assert cache.stats() == {"hits": 2, "misses": 3, "entries": 3}
+
+
+def test_full_cache_overwrites_least_recently_used_slot(tmp_path):
+    cache, embedder = make_cache(tmp_path, max_entries=2)
+    cache.embed(["apple"])
+    cache.embed(["banana"])
+    cache.embed(["apple"])  # banana is now the least recently used
+
+    cache.embed(["cherry"])
+
+    assert cache.get_many(["apple"])[0] is not None
+    assert cache.get_many(["banana"])[0] is None
+    assert cache.get_many(["cherry"])[0] is not None
+    assert cache.stats()["entries"] == 2
+
+
+def test_reopening_reads_vectors_from_disk(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    stored = cache.embed(["apple", "banana"])
+    cache.flush()
+
+    reopened, embedder = make_cache(tmp_path)
+    found = reopened.embed(["apple", "banana"])
+
+    assert embedder.calls == []
+    np.testing.assert_array_equal(found[0], stored[0])
+    np.testing.assert_array_equal(found[1], stored[1])
+
+
+def test_keys_depend_on_the_model(tmp_path):
+    cache, _ = make_cache(tmp_path)
+    other = EmbeddingCache(directory=str(tmp_path), model_name="other-model", embedding_function=CountingEmbedder())
+
+    assert cache.key_for("apple") != other.key_for("apple")
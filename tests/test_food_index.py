@@ -0,0 +1,33 @@
+from utils.food_index import FoodNameIndex
+
+
+def row(name, calories):
+    return {"food_item": name, "food_category": "test", "calories_per_100g": calories, "kj_per_100g": calories * 4.2}
+
+
+INDEX = FoodNameIndex(
+    [row("bread flour", 361), row("bread pudding", 153), row("brown bread", 250), row("banana", 89), row("peach", 39)]
+)
+
+
+def names(rows):
+    return [metadata["food_item"] for metadata in rows]
+
+
+def test_exact_name_and_plurals():
+    assert names(INDEX.search("Banana")) == ["banana"]
+    assert names(INDEX.search("bananas")) == ["banana"]
+    assert names(INDEX.search("peaches")) == ["peach"]
+
+
+def test_same_words_in_any_order():
+    assert names(INDEX.search("bread brown")) == ["brown bread"]
+
+
+def test_typos_are_left_to_vector_search():
+    assert INDEX.search("bannana") == []
+    assert names(INDEX.search_fuzzy("bannana")) == ["banana"]
+
+
+def test_prefix_only_matches_fall_back_to_vector_search():
+    assert INDEX.search("bread") == []
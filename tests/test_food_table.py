@@ -0,0 +1,78 @@
+import pytest
+
+from utils.food_table import FoodTable, calorie_filter_where
+
+
+def row(name, category, calories):
+    return {"food_item": name, "food_category": category, "calories_per_100g": calories, "kj_per_100g": calories * 4.184}
+
+
+TABLE = FoodTable(
+    [
+        row("apple", "fruits", 52),
+        row("banana", "fruits", 89),
+        row("mango", "tropical&exoticfruits", 60),
+        row("canned peach", "cannedfruit", 54),
+        row("oatmeal", "cereal", 68),
+        row("granola", "cereal", 471),
+        row("kiwi", "fruits", 61),
+        row("lime", "fruits", 30),
+    ]
+)
+
+
+def names(rows):
+    return [metadata["food_item"] for metadata in rows]
+
+
+def test_sorts_ascending_and_cuts_to_limit():
+    assert names(TABLE.query(limit=3)) == ["lime", "apple", "canned peach"]
+
+
+def test_descending_top_k():
+    assert names(TABLE.query(descending=True, limit=2)) == ["granola", "banana"]
+
+
+def test_limit_larger_than_the_table_returns_every_row_in_order():
+    rows = TABLE.query(limit=100)
+
+    assert len(rows) == 8
+    calories = [metadata["calories_per_100g"] for metadata in rows]
+    assert calories == sorted(calories)
+
+
+def test_category_and_calorie_filters():
+    rows = TABLE.query(categories=["fruits"], min_calories=50, max_calories=70)
+
+    assert names(rows) == ["apple", "kiwi"]
+
+
+def test_sort_by_name_and_kilojoules():
+    assert names(TABLE.query(categories=["cereal"], sort_by="name")) == ["granola", "oatmeal"]
+    assert names(TABLE.query(sort_by="kj", descending=True, limit=1)) == ["granola"]
+
+
+def test_empty_category_list_and_bad_sort_column():
+    assert TABLE.query(categories=[]) == []
+    with pytest.raises(ValueError):
+        TABLE.query(sort_by="protein")
+
+
+def test_match_categories_by_containment_and_singular():
+    assert TABLE.match_categories("Fruits") == ["fruits", "tropical&exoticfruits"]
+    assert TABLE.match_categories("fruit") == ["cannedfruit", "fruits", "tropical&exoticfruits"]
+    assert TABLE.match_categories("Canned Fruit") == ["cannedfruit"]
+    assert TABLE.match_categories("cereals") == ["cereal"]
+    assert TABLE.match_categories("pasta") == []
+
+
+def test_calorie_filter_where():
+    assert calorie_filter_where() is None
+    assert calorie_filter_where(max_calories=50) == {"calories_per_100g": {"$lte": 50.0}}
+    assert calorie_filter_where(["fruits"], min_calories=10, max_calories=50) == {
+        "$and": [
+            {"food_category": {"$in": ["fruits"]}},
+            {"calories_per_100g": {"$gte": 10.0}},
+            {"calories_per_100g": {"$lte": 50.0}},
+        ]
+    }
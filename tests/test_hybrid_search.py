@@ -0,0 +1,36 @@
+from utils.hybrid_search import DEFAULT_SEARCH_MODE, RRF_K, is_keyword_match, reciprocal_rank_fusion
+
+
+def test_vector_search_is_the_default():
+    assert DEFAULT_SEARCH_MODE == "vector"
+
+
+def test_rrf_rewards_ids_ranked_by_both():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]])
+
+    # b and c are in both rankings, a and d in one each
+    assert fused == ["b", "c", "a", "d"]
+
+
+def test_rrf_of_one_ranking_keeps_its_order():
+    assert reciprocal_rank_fusion([["x", "y", "z"]]) == ["x", "y", "z"]
+
+
+def test_rrf_scores_follow_the_formula():
+    fused = reciprocal_rank_fusion([["a", "b"], ["b"]], k=RRF_K)
+
+    # a: 1/(k+1); b: 1/(k+2) + 1/(k+1)
+    assert fused == ["b", "a"]
+
+
+def test_keyword_match_needs_full_coverage_of_a_short_query():
+    assert is_keyword_match("oatmeal", [("oatmeal", 3.2, 1.0)])
+    assert is_keyword_match("brown bread", [("brown_bread", 5.0, 1.0)])
+    assert not is_keyword_match("brown bread", [("bread_pudding", 1.0, 0.5)])
+    assert not is_keyword_match("oatmeal", [])
+
+
+def test_natural_language_questions_always_get_a_vector_search():
+    question = "what should pregnant women eat for breakfast"
+
+    assert not is_keyword_match(question, [("qa_1", 9.0, 1.0)])
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from utils import lexical_index as lexical_index_module
+from utils.chroma_ingest import mark_collection_updated
+from utils.lexical_index import BM25Index, lexical_index, lexical_index_path, tokenize
+
+IDS = ["oatmeal", "oat_bran", "brown_bread", "bread_pudding"]
+TEXTS = ["oatmeal porridge", "oat bran cereal", "brown bread wholemeal bread", "bread pudding dessert"]
+
+
+class FakeCollection:
+    """
+    Just enough of a chroma collection for BM25Index.from_collection.
+    """
+
+    def __init__(self, name, keywords):
+        self.name = name
+        self.keywords = keywords
+
+    def count(self):
+        return len(self.keywords)
+
+    def get(self, limit, offset, include):
+        ids = list(self.keywords)[offset:offset + limit]
+        return {"ids": ids, "metadatas": [{"keywords": self.keywords[record_id]} for record_id in ids]}
+
+
+def test_tokenize_drops_stopwords_and_splits_underscores():
+    assert tokenize("How many calories are in Brown_Bread?") == ["calories", "brown", "bread"]
+
+
+def test_search_ranks_by_bm25_and_reports_coverage():
+    index = BM25Index.build(IDS, TEXTS)
+
+    hits = index.search("brown bread", 4)
+
+    assert [hit[0] for hit in hits] == ["brown_bread", "bread_pudding"]
+    assert hits[0][1] > hits[1][1]
+    assert hits[0][2] == 1.0 and hits[1][2] == 0.5
+
+
+def test_rarer_terms_weigh_more():
+    index = BM25Index.build(IDS, TEXTS)
+
+    # "pudding" is in one document, "bread" in two
+    assert index.search("pudding", 1)[0][1] > index.search("bread", 2)[1][1]
+
+
+def test_unknown_or_empty_queries_find_nothing():
+    index = BM25Index.build(IDS, TEXTS)
+
+    assert index.search("quinoa") == []
+    assert index.search("the of and") == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(IDS, TEXTS, version="v1")
+    path = str(tmp_path / "index.npz")
+
+    index.save(path)
+    loaded = BM25Index.load(path)
+
+    assert loaded.version == "v1"
+    assert loaded.ids == IDS
+    assert loaded.search("oat bran", 4) == index.search("oat bran", 4)
+
+
+@pytest.fixture
+def project_dir(tmp_path, monkeypatch):
+    # the index and version files live under chroma/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(lexical_index_module, "_indexes", {})
+    return tmp_path
+
+
+def test_lexical_index_is_saved_and_rebuilt_when_the_collection_changes(project_dir):
+    collection = FakeCollection("foods", dict(zip(IDS, TEXTS)))
+    mark_collection_updated("foods")
+
+    first = lexical_index(collection)
+    assert os.path.exists(lexical_index_path("foods"))
+    assert lexical_index(collection) is first
+
+    collection.keywords["quinoa"] = "quinoa grain"
+    version_path = os.path.join("chroma", "collection_versions", "foods")
+    mtime = os.stat(version_path).st_mtime_ns + 1_000_000
+    os.utime(version_path, ns=(mtime, mtime))
+
+    rebuilt = lexical_index(collection)
+    assert rebuilt is not first
+    assert rebuilt.search("quinoa", 1)[0][0] == "quinoa"
+    assert BM25Index.load(lexical_index_path("foods")).version == rebuilt.version
+
+
+def test_lexical_index_loads_a_saved_copy_of_the_same_version(project_dir):
+    collection = FakeCollection("foods", dict(zip(IDS, TEXTS)))
+    mark_collection_updated("foods")
+    lexical_index(collection)
+
+    lexical_index_module._indexes.clear()
+    collection.keywords = {}  # a rebuild would come out empty
+
+    assert len(lexical_index(collection)) == len(IDS)
@@ -0,0 +1,25 @@
+from utils.metrics import MetricsRegistry
+
+
+def test_cache_stats_are_exported_as_gauges():
+    registry = MetricsRegistry()
+    registry.record_cache_stats("calorie_lookup_cache", {"hits": 3, "misses": 1, "hit_rate": 0.75, "enabled": True})
+
+    exported = registry.to_json()
+    assert exported["cache_hits"] == [{"labels": {"cache": "calorie_lookup_cache"}, "value": 3.0}]
+    assert exported["cache_hit_rate"][0]["value"] == 0.75
+    assert "cache_enabled" not in exported
+
+    text = registry.to_prometheus()
+    assert "# TYPE cache_misses gauge" in text
+    assert 'cache_misses{cache="calorie_lookup_cache"} 1' in text
+
+
+def test_histograms_and_gauges_export_side_by_side():
+    registry = MetricsRegistry()
+    registry.observe("tool_seconds", 0.002, tool="calorie_lookup_tool")
+    registry.set_gauge("cache_entries", 10, cache="embedding_cache")
+
+    exported = registry.to_json()
+    assert exported["tool_seconds"][0]["count"] == 1
+    assert exported["cache_entries"][0]["value"] == 10.0
@@ -0,0 +1,40 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def multi_agent(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "offline")
+    return importlib.import_module("multi_agent")
+
+
+def meal(multi_agent):
+    return multi_agent.BreakfastMeal(name="Oatmeal", why_healthy="Fibre.", ingredients=["40g rolled oats"])
+
+
+def fake_runs(monkeypatch, multi_agent, prices_error):
+    async def run(agent, prompt, run_config=None):
+        if agent is multi_agent.breakfast_price_checker_agent:
+            raise prices_error
+        return SimpleNamespace(final_output="150 kcal")
+
+    monkeypatch.setattr(multi_agent.Runner, "run", run)
+
+
+def test_check_meal_reports_a_failed_sub_agent(monkeypatch, multi_agent):
+    fake_runs(monkeypatch, multi_agent, RuntimeError("search down"))
+
+    section = asyncio.run(multi_agent.check_meal(meal(multi_agent)))
+
+    assert "**Calories**\n150 kcal" in section
+    assert "_unavailable (RuntimeError: search down)_" in section
+
+
+def test_check_meal_passes_cancellation_on(monkeypatch, multi_agent):
+    fake_runs(monkeypatch, multi_agent, asyncio.CancelledError())
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(multi_agent.check_meal(meal(multi_agent)))
@@ -0,0 +1,59 @@
+from rag_nutrients_qa_data_setup import in_sample, iter_qa_pairs, parse_qa_record, qa_record_id
+
+QUESTIONS = [f"How much vitamin C is in food number {i}?" for i in range(10_000)]
+
+
+def _write_pairs(path, questions):
+    path.write_text("".join(f"Question: {question}\nAnswer: Some.\n\n\n" for question in questions))
+    return str(path)
+
+
+def test_in_sample_keeps_about_the_requested_share():
+    kept = sum(in_sample(question, 0.1, seed=1) for question in QUESTIONS)
+
+    assert 900 <= kept <= 1100
+
+
+def test_in_sample_is_reproducible_with_a_seed():
+    first = [in_sample(question, 0.1, seed=7) for question in QUESTIONS]
+
+    assert first == [in_sample(question, 0.1, seed=7) for question in QUESTIONS]
+    assert first != [in_sample(question, 0.1, seed=8) for question in QUESTIONS]
+
+
+def test_sample_is_one_pass_and_stable_when_pairs_are_added(tmp_path):
+    path = tmp_path / "qa.txt"
+    before = {pair["id"] for pair in iter_qa_pairs(_write_pairs(path, QUESTIONS[:2000]), 0.1, seed=3)}
+    after = {pair["id"] for pair in iter_qa_pairs(_write_pairs(path, QUESTIONS[:1] + QUESTIONS[2000:2100] + QUESTIONS[1:2000]), 0.1, seed=3)}
+
+    # runs of blank lines between records do not matter, and the new pairs leave the old draws alone
+    assert before and before <= after
+
+
+def test_parse_qa_record():
+    record = "Question: What is fiber?\nAnswer: A carbohydrate the body cannot digest.\n"
+
+    assert parse_qa_record(record) == ("What is fiber?", "A carbohydrate the body cannot digest.")
+
+
+def test_parse_qa_record_without_an_answer():
+    assert parse_qa_record("Question: Orphan question?") == ("Orphan question?", "")
+    assert parse_qa_record("just some text") == ("", "")
+
+
+def test_qa_ids_follow_the_question_not_its_position(tmp_path):
+    path = tmp_path / "qa.txt"
+    path.write_text("Question: What is fiber?\nAnswer: A carbohydrate.\n\nQuestion: What is fat?\nAnswer: A nutrient.\n")
+    before = {pair["question"]: pair["id"] for pair in iter_qa_pairs(str(path), 1.0)}
+    path.write_text("Question: What is salt?\nAnswer: A mineral.\n\n" + path.read_text())
+    after = {pair["question"]: pair["id"] for pair in iter_qa_pairs(str(path), 1.0)}
+
+    assert after["What is fiber?"] == before["What is fiber?"]
+    assert after["What is fat?"] == before["What is fat?"]
+
+
+def test_repeated_questions_get_distinct_ids():
+    seen = {}
+    first = qa_record_id("What is fiber?", seen)
+
+    assert qa_record_id("what  is FIBER?", seen) == first + "-1"
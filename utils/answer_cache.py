@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from utils.calorie_lookup import normalize_query
+from utils.chroma_ingest import DEFAULT_BATCH_SIZE, hnsw_configuration
+from utils.embedding_cache import default_embedding_cache
+from utils.food_index import food_name_index
+from utils.lexical_index import STOPWORDS
+from utils.metrics import metrics
+
+DEFAULT_COLLECTION = "answer_cache"
+DEFAULT_THRESHOLD = 0.92  # cosine similarity; paraphrases of a question score above it
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10_000
+
+NUMBER_WORDS = {
+    "half": "0.5", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "dozen": "12",
+}
+
+
+def question_signature(question: str) -> str:
+    """
+    The numbers (in order) and food words (in any order) of a question:
+    "Calories in 200g of chicken breasts?" -> "200|breast chicken".
+    Questions that differ only in an amount or a food ("100g" vs "200g", "apple"
+    vs "pear") embed almost identically, so a cached answer is only reused for a
+    question with the same signature.
+    """
+    text = re.sub(r"(?<=\d),(?=\d{3}\b)", "", question.lower())  # 1,000 -> 1000
+    index = food_name_index()
+    numbers, foods = [], set()
+    for token in re.findall(r"\d+(?:\.\d+)?|[a-z]+", text):
+        if token[0].isdigit():
+            numbers.append(f"{float(token):g}")
+        elif token in NUMBER_WORDS:
+            numbers.append(NUMBER_WORDS[token])
+        elif token not in STOPWORDS and (food := index.food_word(token)) is not None:
+            foods.add(food)
+    return " ".join(numbers) + "|" + " ".join(sorted(foods))
+
+
+class SemanticAnswerCache:
+    """
+    Final answers of past agent runs in a chroma collection, keyed by the
+    embedding of the question. A new question gets the answer of the most
+    similar past question of the same agent with the same question_signature
+    (numbers and food words) if their cosine similarity is at least threshold
+    and the answer is younger than ttl_seconds.
+
+    When the collection grows past max_entries the least recently used tenth
+    is evicted. stats() reports hits, misses and the agent time saved.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        collection_name: str = DEFAULT_COLLECTION,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._client = client
+        self._collection_name = collection_name
+        self._collection = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+        self.seconds_saved = 0.0
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    if self._client is None:
+                        from utils.retrieval_service import RetrievalService
+
+                        self._client = RetrievalService().client
+                    self._collection = self._client.get_or_create_collection(
+                        name=self._collection_name,
+                        configuration=hnsw_configuration({"space": "cosine"}),
+                        embedding_function=None,
+                    )
+        return self._collection
+
+    @staticmethod
+    def _id_for(agent_name: str, question: str) -> str:
+        return hashlib.sha256(f"{agent_name}\0{normalize_query(question)}".encode("utf-8")).hexdigest()
+
+    def get(self, agent_name: str, question: str) -> Optional[Tuple[str, float]]:
+        """
+        (cached answer, similarity) for the question, or None on a miss.
+        """
+        start = time.perf_counter()
+        result = "miss"
+        try:
+            embedding = default_embedding_cache().embed([question])
+            found = self.collection.query(
+                query_embeddings=embedding,
+                n_results=1,
+                where={"$and": [{"agent": agent_name}, {"signature": question_signature(question)}]},
+                include=["metadatas", "documents", "distances"],
+            )
+            if not found["ids"][0]:
+                return None
+
+            record_id, metadata = found["ids"][0][0], found["metadatas"][0][0]
+            similarity = 1.0 - found["distances"][0][0]
+            if similarity < self.threshold:
+                return None
+            now = time.time()
+            if now - metadata["created_at"] > self.ttl_seconds:
+                self.collection.delete(ids=[record_id])
+                with self._lock:
+                    self.expired += 1
+                return None
+
+            self.collection.update(ids=[record_id], metadatas=[{**metadata, "last_used": now}])
+            result = "hit"
+            with self._lock:
+                self.seconds_saved += metadata.get("run_seconds", 0.0)
+            return found["documents"][0][0], similarity
+        finally:
+            with self._lock:
+                if result == "hit":
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            metrics().observe("answer_cache_lookup_seconds", time.perf_counter() - start, result=result)
+
+    def put(self, agent_name: str, question: str, answer: str, run_seconds: float = 0.0) -> None:
+        now = time.time()
+        self.collection.upsert(
+            ids=[self._id_for(agent_name, question)],
+            embeddings=default_embedding_cache().embed([question]),
+            documents=[answer],
+            metadatas=[
+                {
+                    "agent": agent_name,
+                    "question": question,
+                    "signature": question_signature(question),
+                    "created_at": now,
+                    "last_used": now,
+                    "run_seconds": run_seconds,
+                }
+            ],
+        )
+        with self._lock:
+            self.stores += 1
+        if self.collection.count() > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drop expired entries and the least recently used ones, down to 90% of max_entries.
+        """
+        collection = self.collection
+        entries = []
+        for offset in range(0, collection.count(), DEFAULT_BATCH_SIZE):
+            page = collection.get(limit=DEFAULT_BATCH_SIZE, offset=offset, include=["metadatas"])
+            entries.extend(zip(page["ids"], page["metadatas"]))
+
+        now = time.time()
+        expired, live = [], []
+        for record_id, metadata in entries:
+            if now - metadata["created_at"] > self.ttl_seconds:
+                expired.append(record_id)
+            else:
+                live.append((metadata["last_used"], record_id))
+        live.sort()
+        overflow = max(0, len(live) - int(self.max_entries * 0.9))
+        doomed = expired + [record_id for _, record_id in live[:overflow]]
+        for first in range(0, len(doomed), DEFAULT_BATCH_SIZE):
+            collection.delete(ids=doomed[first:first + DEFAULT_BATCH_SIZE])
+        with self._lock:
+            self.evictions += len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            client = self._client
+            self._collection = None
+        if client is not None:
+            try:
+                client.delete_collection(self._collection_name)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "seconds_saved": self.seconds_saved,
+                "entries": self._collection.count() if self._collection is not None else 0,
+            }
+
+
+async def answer_with_cache(
+    cache: Optional[SemanticAnswerCache],
+    agent_name: str,
+    question: str,
+    run: Callable[[], Awaitable[str]],
+) -> Tuple[str, bool]:
+    """
+    (answer, from_cache): the cached answer to a similar question, or run() whose
+    answer is then cached. The chroma calls run on a worker thread.
+    """
+    if cache is None:
+        return await run(), False
+    cached = await asyncio.to_thread(cache.get, agent_name, question)
+    if cached is not None:
+        return cached[0], True
+    start = time.perf_counter()
+    answer = await run()
+    await asyncio.to_thread(cache.put, agent_name, question, str(answer), time.perf_counter() - start)
+    return answer, False
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def semantic_answer_cache() -> SemanticAnswerCache:
+    """
+    Process-wide answer cache in the answer_cache collection of the chroma database.
+    """
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = SemanticAnswerCache()
+    return _answer_cache
@@ -1,7 +1,31 @@
 import os
 import threading
+from typing import Dict
+
 from dotenv import load_dotenv
 
+# HNSW settings of new chroma collections: env var -> chroma hnsw configuration key
+HNSW_ENV_VARS = {
+    "CHROMA_HNSW_SPACE": "space",
+    "CHROMA_HNSW_EF_CONSTRUCTION": "ef_construction",
+    "CHROMA_HNSW_EF_SEARCH": "ef_search",
+    "CHROMA_HNSW_M": "max_neighbors",
+}
+
+
+def hnsw_settings_from_env() -> Dict:
+    """
+    HNSW settings from CHROMA_HNSW_SPACE, CHROMA_HNSW_EF_CONSTRUCTION, CHROMA_HNSW_EF_SEARCH
+    and CHROMA_HNSW_M (in the environment or .env); the ones not set are left to chroma's defaults.
+    Unlike AppConfig this needs no OPENAI_API_KEY, so the setup scripts can run without one.
+    """
+    load_dotenv(override=True)
+    return {
+        key: value if key == "space" else int(value)
+        for env_var, key in HNSW_ENV_VARS.items()
+        if (value := os.getenv(env_var))
+    }
+
 
 class AppConfig:
     """
@@ -32,6 +56,8 @@ class AppConfig:
         self.open_ai_api_key = os.getenv("OPENAI_API_KEY")
         self.open_ai_default_model = os.getenv("OPENAI_DEFAULT_MODEL")
         self.exa_api_key = os.getenv("EXA_API_KEY")
+        self.exa_mcp_url = os.getenv("EXA_MCP_URL")
+        self.hnsw_settings = hnsw_settings_from_env()
 
         if not self.open_ai_api_key:
             raise ValueError("OPENAI_API_KEY is not set")
@@ -45,6 +71,20 @@ class AppConfig:
     def get_exa_api_key(self):
         return self.exa_api_key
 
+    def get_exa_mcp_url(self):
+        """
+        EXA_MCP_URL if set (e.g. a local stand-in server), otherwise the hosted Exa MCP server.
+        """
+        if self.exa_mcp_url:
+            return self.exa_mcp_url
+        return f"https://mcp.exa.ai/mcp?exaApiKey={self.exa_api_key}"
+
+    def get_hnsw_settings(self) -> Dict:
+        """
+        The CHROMA_HNSW_* settings, see hnsw_settings_from_env.
+        """
+        return dict(self.hnsw_settings)
+
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TextIO, Tuple, Union
+
+from agents import Agent, RunConfig, Runner
+
+from utils.answer_cache import SemanticAnswerCache, answer_with_cache
+from utils.latency import percentiles
+from utils.metrics import timer
+from utils.streaming import stream_agent
+
+
+async def read_questions(stream: TextIO) -> AsyncIterator[Dict]:
+    """
+    Yield questions from a JSONL stream ({"id": ..., "question": ...} per line).
+    Plain-text lines are accepted too and numbered in order. A malformed JSON
+    line yields an item with an "error" that becomes an error result, so it
+    does not end the batch. Lines are read on a worker thread so a slow stdin
+    never blocks the event loop.
+    """
+    line_number = 0
+    while line := await asyncio.to_thread(stream.readline):
+        line = line.strip()
+        if not line:
+            continue
+        line_number += 1
+        if line.startswith("{"):
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                item = {"error": f"{type(e).__name__}: {e}"}
+            item.setdefault("id", line_number)
+        else:
+            item = {"id": line_number, "question": line}
+        yield item
+
+
+# An agent, or an async function(question, run_config=...) returning the answer
+# for workflows that orchestrate several agents themselves
+Workflow = Union[Agent, Callable[..., Awaitable[Any]]]
+
+
+def workflow_name(agent: Workflow) -> str:
+    return agent.name if isinstance(agent, Agent) else agent.__name__
+
+
+async def answer(
+    agent: Workflow, question: str, run_config: Optional[RunConfig] = None, stream: bool = False
+) -> Tuple[str, Optional[float]]:
+    """
+    The answer and, for streamed agent runs, the time to its first token.
+    """
+    if isinstance(agent, Agent) and stream:
+        final_output, metrics = await stream_agent(agent, question, run_config=run_config)
+        return str(final_output), metrics["ttft"]
+    if isinstance(agent, Agent):
+        with timer("agent_run_seconds", agent=agent.name, mode="run"):
+            result = await Runner.run(agent, question, run_config=run_config)
+        return str(result.final_output), None
+    with timer("agent_run_seconds", agent=workflow_name(agent), mode="workflow"):
+        return str(await agent(question, run_config=run_config)), None
+
+
+async def run_question(
+    agent: Workflow,
+    item: Dict,
+    timeout: float,
+    run_config: Optional[RunConfig] = None,
+    stream: bool = False,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+) -> Dict:
+    start = time.perf_counter()
+    ttft = None
+    cached = False
+    question = item.get("question")
+
+    async def run():
+        nonlocal ttft
+        output, ttft = await answer(agent, question, run_config, stream)
+        return output
+
+    if "error" in item:
+        status, output = "error", item["error"]
+    elif not isinstance(question, str):
+        status, output = "error", 'ValueError: item has no "question" string'
+    else:
+        try:
+            output, cached = await asyncio.wait_for(
+                answer_with_cache(answer_cache, workflow_name(agent), question, run), timeout
+            )
+            status = "ok"
+        except asyncio.TimeoutError:
+            status, output = "timeout", None
+        except Exception as e:
+            status, output = "error", f"{type(e).__name__}: {e}"
+    return {
+        "id": item.get("id"),
+        "question": question,
+        "status": status,
+        "output": output,
+        "latency": time.perf_counter() - start,
+        "ttft": ttft,
+        "cached": cached,
+    }
+
+
+async def run_batch(
+    agent: Workflow,
+    questions: AsyncIterator[Dict],
+    concurrency: int = 8,
+    timeout: float = 120,
+    on_result: Optional[Callable[[Dict], None]] = None,
+    run_config: Optional[RunConfig] = None,
+    stream: bool = False,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+) -> Dict:
+    """
+    Run every question against agent with at most `concurrency` runs in flight.
+
+    Questions go through a queue of size `concurrency`, so the reader only pulls
+    new questions as fast as the workers finish them (backpressure) and an endless
+    stream never piles up in memory. Every run gets its own timeout.
+    Returns a summary with counts, throughput and latency percentiles, plus
+    time-to-first-token percentiles when stream is True. With an answer_cache,
+    questions similar to ones answered before skip the agent (see utils/answer_cache.py).
+    """
+    queue = asyncio.Queue(maxsize=concurrency)
+    results: List[Dict] = []
+
+    async def producer():
+        async for item in questions:
+            await queue.put(item)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def worker():
+        while (item := await queue.get()) is not None:
+            result = await run_question(agent, item, timeout, run_config, stream, answer_cache)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+    start = time.perf_counter()
+    await asyncio.gather(producer(), *(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return summarize(results, elapsed)
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    latencies = [result["latency"] for result in results if result["status"] == "ok"]
+    summary = {
+        "requests": len(results),
+        "ok": sum(result["status"] == "ok" for result in results),
+        "timeouts": sum(result["status"] == "timeout" for result in results),
+        "errors": sum(result["status"] == "error" for result in results),
+        "cached": sum(bool(result.get("cached")) for result in results),
+        "wall_seconds": elapsed,
+        "throughput_per_second": len(results) / elapsed if elapsed else 0.0,
+    }
+    summary.update({f"latency_{name}": value for name, value in percentiles(latencies).items()})
+    ttfts = [result["ttft"] for result in results if result.get("ttft") is not None]
+    if ttfts:
+        summary.update({f"ttft_{name}": value for name, value in percentiles(ttfts).items()})
+    return summary
@@ -0,0 +1,238 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.chroma_ingest import collection_version_path
+from utils.embedding_cache import query_with_cache
+from utils.food_index import food_name_index
+from utils.food_table import calorie_filter_where, food_table
+from utils.hybrid_search import DEFAULT_SEARCH_MODE, hybrid_query
+from utils.metrics import timer
+from utils.query_cache import QueryResultCache
+from utils.result_formatter import DEFAULT_TOKEN_BUDGET, pack_lines, token_savings
+
+# Shared by every calorie_lookup_tool in the process, keyed by (normalized query, max_results)
+calorie_lookup_cache = QueryResultCache(
+    max_entries=1024,
+    ttl_seconds=600,
+    version_file=collection_version_path("nutrition_db"),
+)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def format_calorie_results(query: str, metadatas: List[Dict], token_budget: Optional[int] = None) -> str:
+    """
+    Format nutrition_db metadata rows for the agent, one line per distinct food,
+    stopping once the token budget (see utils/result_formatter.py) is spent.
+    """
+    if not metadatas:
+        return f"No nutrition information found for: {query}"
+
+    distinct = {}
+    for metadata in metadatas:
+        distinct.setdefault(metadata["food_item"], metadata)
+    return pack_lines("Nutrition Information:", format_food_rows(list(distinct.values())), token_budget or DEFAULT_TOKEN_BUDGET)
+
+
+def format_food_rows(metadatas: List[Dict]) -> List[str]:
+    # str.title capitalizes the first letter of each word
+    return [
+        f"{metadata['food_item'].title()} ({metadata['food_category'].title()}): "
+        f"{metadata['calories_per_100g']:g} calories per 100g"
+        for metadata in metadatas
+    ]
+
+
+def _format_and_record(query: str, metadatas: List[Dict]) -> str:
+    formatted = format_calorie_results(query, metadatas)
+    if metadatas:
+        full = "Nutrition Information:\n" + "\n".join(format_food_rows(metadatas))
+        token_savings().record("calorie_lookup", full, formatted)
+    return formatted
+
+
+def _or_fuzzy(query: str, metadatas: List[Dict], limit: int) -> List[Dict]:
+    """
+    The search results, or the name index's near-spellings of the query if the search found nothing.
+    """
+    return metadatas or food_name_index().search_fuzzy(query, limit)
+
+
+def lookup_calories(collection, query: str, max_results: int = 3, mode: str = DEFAULT_SEARCH_MODE) -> str:
+    """
+    Look up calorie information in the nutrition_db collection.
+    Repeated queries are answered from calorie_lookup_cache until they expire
+    or the collection is re-ingested. Food names the in-memory name index knows
+    are answered from it; everything else is searched as mode says (see hybrid_query).
+    """
+    key = (normalize_query(query), max_results)
+    with timer("retrieval_stage_seconds", stage="result_cache"):
+        cached = calorie_lookup_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with timer("retrieval_stage_seconds", stage="name_index"):
+        metadatas = food_name_index().search(query, max_results)
+    if not metadatas:
+        results = hybrid_query(collection, [query], n_results=max_results, mode=mode)
+        metadatas = _or_fuzzy(query, results["metadatas"][0], max_results)
+    with timer("retrieval_stage_seconds", stage="format"):
+        formatted = _format_and_record(query, metadatas)
+    calorie_lookup_cache.put(key, formatted)
+    return formatted
+
+
+def lookup_calories_batch(
+    collection, food_items: List[str], max_results: int = 3, mode: str = DEFAULT_SEARCH_MODE
+) -> str:
+    """
+    Look up several food items with at most one nutrition_db query.
+    Items already cached or known to the name index are answered locally and the
+    rest are searched together, with at most one embedding and vector query call.
+    """
+    answers = {}
+    spellings = {}  # key -> the first spelling of the item, used in the output
+    unresolved = []
+    for food_item in food_items:
+        key = (normalize_query(food_item), max_results)
+        if key in answers:
+            continue
+        spellings[key] = food_item
+        with timer("retrieval_stage_seconds", stage="result_cache"):
+            cached = calorie_lookup_cache.get(key)
+        if cached is not None:
+            answers[key] = cached
+            continue
+        with timer("retrieval_stage_seconds", stage="name_index"):
+            metadatas = food_name_index().search(food_item, max_results)
+        if metadatas:
+            answers[key] = _format_and_record(food_item, metadatas)
+            calorie_lookup_cache.put(key, answers[key])
+        else:
+            answers[key] = None  # filled in by the search below
+            unresolved.append(food_item)
+
+    if unresolved:
+        results = hybrid_query(collection, unresolved, n_results=max_results, mode=mode)
+        for food_item, metadatas in zip(unresolved, results["metadatas"]):
+            key = (normalize_query(food_item), max_results)
+            answers[key] = _format_and_record(food_item, _or_fuzzy(food_item, metadatas, max_results))
+            calorie_lookup_cache.put(key, answers[key])
+
+    sections = [f"{food_item}:\n" + answers[key] for key, food_item in spellings.items()]
+    return "\n\n".join(sections)
+
+
+MAX_FOOD_RESULTS = 50
+
+
+def lookup_foods(
+    collection,
+    query: Optional[str] = None,
+    category: Optional[str] = None,
+    min_calories: Optional[float] = None,
+    max_calories: Optional[float] = None,
+    sort_by: str = "calories",
+    descending: bool = False,
+    limit: int = 10,
+) -> str:
+    """
+    Filter, sort and top-k over the calorie table, e.g. the five lowest-calorie
+    fruits or foods under 50 calories in CannedFruit. With a query the foods are
+    ranked by semantic similarity instead, and the filter is applied inside
+    nutrition_db as a where clause. limit is clamped to 1..MAX_FOOD_RESULTS.
+    """
+    limit = min(max(1, limit), MAX_FOOD_RESULTS)
+    table = food_table()
+    categories = None
+    if category:
+        categories = table.match_categories(category)
+        if not categories:
+            known = ", ".join(sorted(table.category_rows))
+            return f"No food category matches: {category}. Known categories: {known}"
+
+    described = " ".join(
+        part
+        for part in (
+            query and f"matching '{query}'",
+            categories and f"in {', '.join(categories)}",
+            min_calories is not None and f"with at least {min_calories:g} calories per 100g",
+            max_calories is not None and f"with at most {max_calories:g} calories per 100g",
+        )
+        if part
+    ) or "all foods"
+
+    if query:
+        where = calorie_filter_where(categories, min_calories, max_calories)
+        with timer("retrieval_stage_seconds", stage="filtered_query"):
+            results = query_with_cache(collection, [query], n_results=limit, where=where)
+        metadatas = results["metadatas"][0]
+    else:
+        with timer("retrieval_stage_seconds", stage="food_table"):
+            metadatas = table.query(categories, min_calories, max_calories, sort_by, descending, limit)
+
+    if not metadatas:
+        return f"No foods found {described}"
+    order = "" if query else f", by {sort_by} {'descending' if descending else 'ascending'}"
+    return f"Foods {described}{order}:\n" + "\n".join(format_food_rows(metadatas))
+
+
+def resolve_foods(collection, names: Sequence[str], mode: str = DEFAULT_SEARCH_MODE) -> List[Optional[Dict]]:
+    """
+    The best nutrition_db row for every name: from the name index where it knows
+    the food, otherwise from one search for all the rest. None if nothing matches.
+    """
+    rows: List[Optional[Dict]] = []
+    unresolved = []
+    for i, name in enumerate(names):
+        with timer("retrieval_stage_seconds", stage="name_index"):
+            metadatas = food_name_index().search(name, 1)
+        rows.append(metadatas[0] if metadatas else None)
+        if not metadatas:
+            unresolved.append(i)
+
+    if unresolved:
+        results = hybrid_query(collection, [names[i] for i in unresolved], n_results=1, mode=mode)
+        for i, metadatas in zip(unresolved, results["metadatas"]):
+            metadatas = _or_fuzzy(names[i], metadatas, 1)
+            rows[i] = metadatas[0] if metadatas else None
+    return rows
+
+
+def lookup_meal_calories(
+    collection, ingredients: Sequence[Tuple[str, float]], mode: str = DEFAULT_SEARCH_MODE
+) -> str:
+    """
+    Calories of a meal given (ingredient, grams) pairs: every ingredient is
+    matched to a food in one batch, and per-ingredient and total kcal and kJ are
+    computed here instead of by the model. Returns a compact table.
+    """
+    if not ingredients:
+        return "No ingredients given"
+
+    names = [name for name, _ in ingredients]
+    rows = resolve_foods(collection, names, mode)
+
+    with timer("retrieval_stage_seconds", stage="meal_totals"):
+        grams = np.array([grams for _, grams in ingredients], dtype=np.float64)
+        found = np.array([row is not None for row in rows])
+        per_100g = np.array(
+            [[row["calories_per_100g"], row["kj_per_100g"]] if row else [0.0, 0.0] for row in rows], dtype=np.float64
+        )
+        energy = per_100g * grams[:, None] / 100  # (ingredient, [kcal, kJ])
+        total_grams = grams[found].sum()
+        total_kcal, total_kj = energy[found].sum(axis=0)
+
+    lines = ["ingredient | matched food | grams | kcal | kJ"]
+    for name, row, weight, (kcal, kj) in zip(names, rows, grams, energy):
+        if row is None:
+            lines.append(f"{name} | not found | {weight:g} | - | -")
+        else:
+            lines.append(f"{name} | {row['food_item'].title()} | {weight:g} | {kcal:.0f} | {kj:.0f}")
+    lines.append(f"total | | {total_grams:g} | {total_kcal:.0f} | {total_kj:.0f}")
+    if not found.all():
+        lines.append("ingredients not found are left out of the total")
+    return "\n".join(lines)
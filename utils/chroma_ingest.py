@@ -0,0 +1,331 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_BATCH_SIZE = 1000
+CHECKPOINT_DIR = os.path.join("chroma", "ingest_checkpoints")
+VERSION_DIR = os.path.join("chroma", "collection_versions")
+
+# (id, document, metadata)
+Record = Tuple[str, str, Dict]
+
+
+def checkpoint_path_for(collection_name: str) -> str:
+    """
+    Location of the checkpoint file for a collection.
+    """
+    return os.path.join(CHECKPOINT_DIR, f"{collection_name}.json")
+
+
+def collection_version_path(collection_name: str) -> str:
+    """
+    File whose modification time changes every time the collection is written,
+    used by query caches to notice a re-ingest.
+    """
+    return os.path.join(VERSION_DIR, collection_name)
+
+
+def mark_collection_updated(collection_name: str) -> None:
+    os.makedirs(VERSION_DIR, exist_ok=True)
+    with open(collection_version_path(collection_name), "w", encoding="utf-8") as file:
+        file.write(str(time.time_ns()))
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    """
+    Read a checkpoint written by a previous, unfinished ingest run.
+    Returns None if there is nothing to resume.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_checkpoint(path: str, state: Dict) -> None:
+    """
+    Atomically persist ingest progress so a crash never leaves a half-written file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file)
+    os.replace(tmp_path, path)
+
+
+def clear_checkpoint(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def source_fingerprint(source: str) -> Dict:
+    """
+    Size and modification time of the source file, stored in the checkpoint so
+    a run is never resumed against a file that changed in between.
+    """
+    stat = os.stat(source)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def stable_record_id(prefix: str, key: str, seen: Dict[str, int]) -> str:
+    """
+    Id derived from a natural key of the record (e.g. a food name) instead of
+    its position, so inserting or deleting a row leaves every other id alone
+    and an incremental sync only touches the rows that really changed.
+    seen counts the keys handed out so far; the n-th repeat of a key gets a "-n" suffix.
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    repeat = seen.get(key, 0)
+    seen[key] = repeat + 1
+    return f"{prefix}_{digest}-{repeat}" if repeat else f"{prefix}_{digest}"
+
+
+def iter_records(data: Dict) -> Iterator[Record]:
+    """
+    Turn the {"documents", "metadatas", "ids"} dict built by the
+    prepare_* functions into a stream of records.
+    """
+    return zip(data["ids"], data["documents"], data["metadatas"])
+
+
+def content_hash(document: str, metadata: Dict) -> str:
+    """
+    Stable hash of everything we store for a record, used to skip unchanged rows.
+    """
+    payload = json.dumps([document, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def with_content_hash(records: Iterable[Record]) -> Iterator[Record]:
+    """
+    Add a content_hash field to the metadata of every record.
+    """
+    for record_id, document, metadata in records:
+        yield record_id, document, {**metadata, "content_hash": content_hash(document, metadata)}
+
+
+def batched(records: Iterable[Record], batch_size: int) -> Iterator[List[Record]]:
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+def effective_batch_size(client, batch_size: int) -> int:
+    """
+    Clamp the requested batch size to what the chroma client accepts in one call.
+    """
+    return max(1, min(batch_size, client.get_max_batch_size()))
+
+
+def _upsert(collection, ids, documents, metadatas, embedding_cache=None) -> None:
+    embeddings = embedding_cache.embed(documents) if embedding_cache is not None else None
+    collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+
+def ingest_in_batches(
+    collection,
+    records: Iterable[Record],
+    checkpoint_path: str,
+    checkpoint: Dict,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    embedding_cache=None,
+) -> int:
+    """
+    Stream records into a collection in chunks of batch_size.
+    After every chunk the number of committed records is saved in the checkpoint,
+    so a rerun can skip what is already stored. Records must come in the same
+    order on every run. Returns the total number of records in the collection
+    from this source. With an embedding_cache, vectors are looked up (or computed
+    and stored) there and handed to chroma directly.
+    """
+    committed = checkpoint.get("committed", 0)
+    if committed:
+        print(f"Resuming ingest of '{collection.name}' after {committed} records")
+
+    pending = with_content_hash(itertools.islice(records, committed, None))
+
+    start = time.perf_counter()
+    ingested = 0
+    for batch in batched(pending, batch_size):
+        ids, documents, metadatas = (list(column) for column in zip(*batch))
+
+        batch_start = time.perf_counter()
+        # upsert keeps a rerun idempotent if we crashed between the write and the checkpoint
+        _upsert(collection, ids, documents, metadatas, embedding_cache)
+        batch_seconds = time.perf_counter() - batch_start
+
+        mark_collection_updated(collection.name)
+        committed += len(batch)
+        ingested += len(batch)
+        checkpoint["committed"] = committed
+        save_checkpoint(checkpoint_path, checkpoint)
+
+        print(
+            f"  committed {committed} records "
+            f"({len(batch) / max(batch_seconds, 1e-9):.0f} rows/sec for this batch)"
+        )
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Ingested {ingested} records into '{collection.name}' in {elapsed:.1f}s "
+        f"({ingested / max(elapsed, 1e-9):.0f} rows/sec)"
+    )
+
+    if embedding_cache is not None:
+        embedding_cache.flush()
+        print(f"Embedding cache: {embedding_cache.stats()}")
+
+    clear_checkpoint(checkpoint_path)
+    return committed
+
+
+# fixed once the index is built; only ef_search can be changed on an existing collection
+HNSW_BUILD_SETTINGS = ("space", "ef_construction", "max_neighbors")
+
+
+def hnsw_configuration(hnsw: Optional[Dict]) -> Optional[Dict]:
+    """
+    create_collection configuration for HNSW settings such as
+    {"space": "cosine", "ef_construction": 200, "ef_search": 64, "max_neighbors": 16}.
+    """
+    return {"hnsw": dict(hnsw)} if hnsw else None
+
+
+def apply_hnsw_settings(collection, hnsw: Optional[Dict]) -> None:
+    """
+    Bring an existing collection in line with hnsw: ef_search is updated in place,
+    other differences are only reported because they need the index rebuilt.
+    """
+    if not hnsw:
+        return
+    current = (collection.configuration or {}).get("hnsw") or {}
+    if "ef_search" in hnsw and current.get("ef_search") != hnsw["ef_search"]:
+        collection.modify(configuration={"hnsw": {"ef_search": hnsw["ef_search"]}})
+    for setting in HNSW_BUILD_SETTINGS:
+        if setting in hnsw and current.get(setting) != hnsw[setting]:
+            print(
+                f" collection '{collection.name}' was built with {setting}={current.get(setting)}, "
+                f"not {hnsw[setting]}; run a full (non-incremental) setup to rebuild it"
+            )
+
+
+def open_collection_for_ingest(
+    client,
+    collection_name: str,
+    metadata: Dict,
+    source: str,
+    resume: bool = True,
+    hnsw: Optional[Dict] = None,
+    **checkpoint_fields,
+):
+    """
+    Get the collection to ingest into together with its checkpoint.
+    An unfinished run is resumed only if it read the same, unchanged source
+    (see source_fingerprint) with the same extra keyword arguments; otherwise
+    the collection is dropped and created again from scratch.
+    A new collection gets the hnsw index settings (see hnsw_configuration).
+    Extra keyword arguments are stored in a fresh checkpoint (e.g. a sampling seed).
+    """
+    checkpoint_path = checkpoint_path_for(collection_name)
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    expected = {"source": source, **source_fingerprint(source), **checkpoint_fields}
+
+    if checkpoint:
+        changed = sorted(key for key, value in expected.items() if checkpoint.get(key) != value)
+        if changed:
+            print(f" checkpoint does not match this run ({', '.join(changed)} changed), starting over")
+        else:
+            try:
+                collection = client.get_collection(collection_name)
+                apply_hnsw_settings(collection, hnsw)
+                return collection, checkpoint
+            except Exception:
+                print(f" collection '{collection_name}' is gone, starting over")
+
+    # Create collection (delete if exists)
+    try:
+        print(" deleting existing collection")
+        client.delete_collection(collection_name)
+    except Exception:
+        pass
+
+    collection = client.create_collection(
+        name=collection_name, metadata=metadata, configuration=hnsw_configuration(hnsw)
+    )
+    mark_collection_updated(collection_name)
+    checkpoint = {"collection": collection_name, "committed": 0, **expected}
+    save_checkpoint(checkpoint_path, checkpoint)
+    return collection, checkpoint
+
+
+def existing_content_hashes(collection, page_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Optional[str]]:
+    """
+    Map every id stored in the collection to its content_hash (None for rows
+    written before hashes were stored).
+    """
+    hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for record_id, metadata in zip(page["ids"], page["metadatas"]):
+            hashes[record_id] = (metadata or {}).get("content_hash")
+        if len(page["ids"]) < page_size:
+            return hashes
+        offset += page_size
+
+
+def sync_collection(
+    collection,
+    records: Iterable[Record],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    embedding_cache=None,
+) -> Dict[str, int]:
+    """
+    Bring a live collection in line with records without recreating it.
+    Only new or changed records (by content hash) are upserted and ids that
+    are no longer produced are deleted, so the collection stays queryable
+    the whole time. Returns counts of added, updated, deleted and unchanged records.
+    """
+    start = time.perf_counter()
+    existing = existing_content_hashes(collection, batch_size)
+
+    stats = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    seen = set()
+    for batch in batched(with_content_hash(records), batch_size):
+        changed = []
+        for record in batch:
+            record_id, _, metadata = record
+            seen.add(record_id)
+            if record_id not in existing:
+                stats["added"] += 1
+                changed.append(record)
+            elif existing[record_id] != metadata["content_hash"]:
+                stats["updated"] += 1
+                changed.append(record)
+            else:
+                stats["unchanged"] += 1
+
+        if changed:
+            ids, documents, metadatas = (list(column) for column in zip(*changed))
+            _upsert(collection, ids, documents, metadatas, embedding_cache)
+            mark_collection_updated(collection.name)
+
+    removed = [record_id for record_id in existing if record_id not in seen]
+    for start_index in range(0, len(removed), batch_size):
+        collection.delete(ids=removed[start_index:start_index + batch_size])
+    stats["deleted"] = len(removed)
+    if removed:
+        mark_collection_updated(collection.name)
+
+    if embedding_cache is not None:
+        embedding_cache.flush()
+
+    print(
+        f"Synced '{collection.name}' in {time.perf_counter() - start:.1f}s: "
+        f"{stats['added']} added, {stats['updated']} updated, "
+        f"{stats['deleted']} deleted, {stats['unchanged']} unchanged"
+    )
+    return stats
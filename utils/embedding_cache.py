@@ -0,0 +1,238 @@
+import atexit
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from utils.metrics import timer
+
+DEFAULT_CACHE_DIR = os.path.join("chroma", "embedding_cache")
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"  # model behind chroma's DefaultEmbeddingFunction
+DEFAULT_MAX_ENTRIES = 100_000
+
+_KEY_BYTES = 16
+
+
+class EmbeddingCache:
+    """
+    On-disk cache of embedding vectors keyed by (embedding model, text hash).
+
+    Layout of <directory>/<model_name>/:
+        vectors.f32    memory-mapped float32 array, one row per slot
+        keys.bin       16-byte digest of the text owning each slot (zeros = free)
+        last_used.u64  last access time per slot, used for LRU eviction
+        meta.json      dimension and capacity
+
+    The number of slots is fixed at max_entries; when the cache is full the least
+    recently used slots are overwritten. Writers serialize through a lock file and
+    a lookup only counts as a hit if the slot still holds the requested digest,
+    so several processes can share one cache.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        model_name: str = DEFAULT_MODEL_NAME,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        embedding_function: Optional[Callable[[List[str]], Sequence]] = None,
+    ):
+        self.model_name = model_name
+        self.directory = os.path.join(directory, model_name)
+        self.max_entries = max_entries
+        self._embedding_function = embedding_function
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        self._vectors = None
+        self._keys = None
+        self._last_used = None
+        self._index = {}
+        self._open_existing()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open_existing(self) -> None:
+        meta_path = self._path("meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        self._map_files(meta["dimension"], meta["capacity"], mode="r+")
+
+    def _create(self, dimension: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._map_files(dimension, self.max_entries, mode="w+")
+        with open(self._path("meta.json"), "w", encoding="utf-8") as file:
+            json.dump({"model": self.model_name, "dimension": dimension, "capacity": self.max_entries}, file)
+
+    def _map_files(self, dimension: int, capacity: int, mode: str) -> None:
+        self.dimension = dimension
+        self.capacity = capacity
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode=mode, shape=(capacity, dimension))
+        self._keys = np.memmap(self._path("keys.bin"), dtype=np.uint8, mode=mode, shape=(capacity, _KEY_BYTES))
+        self._last_used = np.memmap(self._path("last_used.u64"), dtype=np.uint64, mode=mode, shape=(capacity,))
+
+        occupied = np.flatnonzero(self._keys.any(axis=1))
+        self._index = {self._keys[slot].tobytes(): int(slot) for slot in occupied}
+
+    @contextmanager
+    def _writer_lock(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path("lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def key_for(self, text: str) -> bytes:
+        return hashlib.blake2b(
+            f"{self.model_name}\0{text}".encode("utf-8"), digest_size=_KEY_BYTES
+        ).digest()
+
+    def _slot_for(self, key: bytes) -> Optional[int]:
+        slot = self._index.get(key)
+        if slot is None or self._keys[slot].tobytes() != key:
+            return None  # never seen, or evicted by another writer
+        return slot
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Cached vectors for texts, None where the text is not cached.
+        """
+        with self._lock:
+            if self._vectors is None:
+                self.misses += len(texts)
+                return [None] * len(texts)
+
+            now = time.time_ns()
+            found = []
+            for text in texts:
+                slot = self._slot_for(self.key_for(text))
+                if slot is None:
+                    self.misses += 1
+                    found.append(None)
+                else:
+                    self.hits += 1
+                    self._last_used[slot] = now
+                    found.append(np.array(self._vectors[slot]))
+            return found
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence) -> None:
+        """
+        Store vectors for texts, evicting least recently used entries when full.
+        """
+        if not texts:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        with self._lock, self._writer_lock():
+            if self._vectors is None:
+                self._open_existing()
+            if self._vectors is None:
+                self._create(vectors.shape[1])
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match cache dimension {self.dimension}"
+                )
+
+            # Deduplicate and drop texts another writer may already have stored
+            pending = {}
+            for text, vector in zip(texts, vectors):
+                key = self.key_for(text)
+                if self._slot_for(key) is None:
+                    pending[key] = vector
+            if not pending:
+                return
+
+            slots = self._allocate(len(pending))
+            now = time.time_ns()
+            for slot, (key, vector) in zip(slots, pending.items()):
+                self._index.pop(self._keys[slot].tobytes(), None)
+                self._vectors[slot] = vector
+                # the key goes in last so readers never match a half-written vector
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._last_used[slot] = now
+                self._index[key] = int(slot)
+
+    def _allocate(self, count: int) -> np.ndarray:
+        """
+        Pick count slots: free ones first, then the least recently used.
+        """
+        count = min(count, self.capacity)
+        free = np.flatnonzero(~self._keys.any(axis=1))[:count]
+        missing = count - len(free)
+        if missing <= 0:
+            return free
+
+        used_order = np.asarray(self._last_used).copy()
+        used_order[free] = np.iinfo(np.uint64).max
+        evicted = np.argpartition(used_order, missing - 1)[:missing]
+        return np.concatenate([free, evicted])
+
+    def flush(self) -> None:
+        with self._lock:
+            for array in (self._vectors, self._keys, self._last_used):
+                if array is not None:
+                    array.flush()
+
+    @property
+    def embedding_function(self):
+        if self._embedding_function is None:
+            from chromadb.utils import embedding_functions
+
+            self._embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        return self._embedding_function
+
+    def embed(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """
+        Embeddings for texts, computing and caching only the ones not cached yet.
+        """
+        texts = list(texts)
+        vectors = self.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embedding_function([texts[i] for i in missing])
+            self.put_many([texts[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = np.asarray(vector, dtype=np.float32)
+        return vectors
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._index)}
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_embedding_cache() -> EmbeddingCache:
+    """
+    Process-wide cache shared by the setup modules and the query tools.
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = EmbeddingCache()
+                atexit.register(_default_cache.flush)
+    return _default_cache
+
+
+def query_with_cache(collection, query_texts: List[str], n_results: int, **kwargs):
+    """
+    collection.query with the query embeddings served from the embedding cache.
+    """
+    with timer("retrieval_stage_seconds", stage="embedding"):
+        embeddings = default_embedding_cache().embed(query_texts)
+    with timer("retrieval_stage_seconds", stage="chroma_query", collection=collection.name):
+        return collection.query(query_embeddings=embeddings, n_results=n_results, **kwargs)
@@ -0,0 +1,300 @@
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from agents import Agent, Model, ModelProvider, ModelResponse, Usage, set_tracing_disabled
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseCreatedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputItemDoneEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+DEFAULT_FINAL_TEXT = "This is a scripted answer."
+
+
+def load_scripts(path: str) -> Dict[str, List[Dict]]:
+    """
+    Read a scripts file: {"<agent name>": [turn, turn, ...], ...}.
+
+    A turn is {"tool_calls": [{"name": ..., "arguments": {...}}], "text": "..."}.
+    Turns with tool_calls make the agent call those tools (a handoff is the
+    transfer_to_<agent> tool); the first turn without tool calls ends the run
+    with its text as the final output.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _item_type(item) -> Optional[str]:
+    return item.get("type") if isinstance(item, dict) else getattr(item, "type", None)
+
+
+def _estimate_tokens(value) -> int:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return max(1, len(text) // 4)
+
+
+class ScriptedModel(Model):
+    """
+    Deterministic offline stand-in for an LLM.
+
+    It replays a script per agent (recognized by its instructions) and waits a
+    simulated latency before answering, so a run exercises the real Runner, tools,
+    retrieval and MCP calls without network access or token costs. The turn an
+    agent is on is read back from the call ids it produced earlier in the
+    conversation, so one instance serves any number of concurrent runs.
+    """
+
+    def __init__(
+        self,
+        scripts: Dict[str, List[Dict]],
+        agents: Iterable[Agent],
+        latency: float = 0.5,
+        jitter: float = 0.0,
+        tokens_per_second: float = 0.0,
+        seed: int = 0,
+    ):
+        self.scripts = scripts
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+        self._agent_by_instructions = {
+            agent.instructions: agent.name for agent in agents if isinstance(agent.instructions, str)
+        }
+
+    def _agent_name(self, system_instructions: Optional[str]) -> str:
+        return self._agent_by_instructions.get(system_instructions, "unknown agent")
+
+    def _turn_index(self, agent_name: str, input) -> int:
+        if isinstance(input, str):
+            return 0
+        prefix = f"{_slug(agent_name)}-"
+        turns = set()
+        for item in input:
+            call_id = item.get("call_id", "") if isinstance(item, dict) else getattr(item, "call_id", "")
+            if _item_type(item) == "function_call" and call_id.startswith(prefix):
+                turns.add(call_id.split("-")[-2])
+        return len(turns)
+
+    def _turn(self, agent_name: str, turn_index: int) -> Dict:
+        script = self.scripts.get(agent_name, [])
+        if turn_index < len(script):
+            return script[turn_index]
+        final_text = next(
+            (turn["text"] for turn in reversed(script) if "text" in turn and not turn.get("tool_calls")),
+            DEFAULT_FINAL_TEXT,
+        )
+        return {"text": final_text}
+
+    def _delay(self, agent_name: str, turn_index: int) -> float:
+        # seeded per (agent, turn) so concurrent runs get the same delays in any order
+        rng = random.Random(f"{self.seed}-{agent_name}-{turn_index}")
+        return self.latency + rng.uniform(0, self.jitter)
+
+    def _output(self, agent_name: str, turn_index: int, turn: Dict) -> List:
+        output = []
+        slug = _slug(agent_name)
+        for i, call in enumerate(turn.get("tool_calls", [])):
+            output.append(
+                ResponseFunctionToolCall(
+                    id=f"fc_{uuid.uuid4().hex}",
+                    call_id=f"{slug}-{turn_index}-{i}",
+                    name=call["name"],
+                    arguments=json.dumps(call.get("arguments", {})),
+                    type="function_call",
+                    status="completed",
+                )
+            )
+        if "text" in turn or not output:
+            output.append(
+                ResponseOutputMessage(
+                    id=f"msg_{uuid.uuid4().hex}",
+                    role="assistant",
+                    status="completed",
+                    type="message",
+                    content=[
+                        ResponseOutputText(
+                            text=turn.get("text", DEFAULT_FINAL_TEXT), type="output_text", annotations=[]
+                        )
+                    ],
+                )
+            )
+        return output
+
+    def _usage(self, input, output: List) -> Usage:
+        input_tokens = _estimate_tokens(input)
+        output_tokens = sum(_estimate_tokens(item.model_dump()) for item in output)
+        return Usage(
+            requests=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+        )
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ) -> ModelResponse:
+        agent_name = self._agent_name(system_instructions)
+        turn_index = self._turn_index(agent_name, input)
+        turn = self._turn(agent_name, turn_index)
+        output = self._output(agent_name, turn_index, turn)
+
+        delay = self._delay(agent_name, turn_index)
+        if self.tokens_per_second:
+            delay += len(turn.get("text", "")) / 4 / self.tokens_per_second
+        await asyncio.sleep(delay)
+
+        return ModelResponse(output=output, usage=self._usage(input, output), response_id=None)
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        *,
+        previous_response_id=None,
+        conversation_id=None,
+        prompt=None,
+    ) -> AsyncIterator:
+        agent_name = self._agent_name(system_instructions)
+        turn_index = self._turn_index(agent_name, input)
+        turn = self._turn(agent_name, turn_index)
+        output = self._output(agent_name, turn_index, turn)
+        usage = self._usage(input, output)
+
+        response = Response(
+            id=f"resp_{uuid.uuid4().hex}",
+            created_at=time.time(),
+            model="scripted",
+            object="response",
+            output=[],
+            parallel_tool_calls=True,
+            tool_choice="auto",
+            tools=[],
+        )
+        sequence_number = 0
+        yield ResponseCreatedEvent(response=response, sequence_number=sequence_number, type="response.created")
+
+        # time to first token, then the text in word-sized deltas
+        await asyncio.sleep(self._delay(agent_name, turn_index))
+        message = next((item for item in output if isinstance(item, ResponseOutputMessage)), None)
+        if message is not None:
+            words = re.findall(r"\S+\s*", message.content[0].text)
+            for word in words:
+                if self.tokens_per_second:
+                    await asyncio.sleep(1 / self.tokens_per_second)
+                sequence_number += 1
+                yield ResponseTextDeltaEvent(
+                    content_index=0,
+                    delta=word,
+                    item_id=message.id,
+                    logprobs=[],
+                    output_index=output.index(message),
+                    sequence_number=sequence_number,
+                    type="response.output_text.delta",
+                )
+
+        for output_index, item in enumerate(output):
+            sequence_number += 1
+            yield ResponseOutputItemDoneEvent(
+                item=item,
+                output_index=output_index,
+                sequence_number=sequence_number,
+                type="response.output_item.done",
+            )
+
+        response.output = output
+        response.usage = ResponseUsage(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            total_tokens=usage.total_tokens,
+            input_tokens_details=InputTokensDetails(cached_tokens=0),
+            output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+        )
+        sequence_number += 1
+        yield ResponseCompletedEvent(response=response, sequence_number=sequence_number, type="response.completed")
+
+
+class ScriptedModelProvider(ModelProvider):
+    """
+    Model provider that hands out one ScriptedModel for every model name,
+    for use as RunConfig(model_provider=...).
+    """
+
+    def __init__(self, model: ScriptedModel):
+        self.model = model
+
+    def get_model(self, model_name: Optional[str]) -> Model:
+        return self.model
+
+
+def collect_agents(agents: Iterable[Agent]) -> List[Agent]:
+    """
+    The given agents plus every agent reachable through their handoffs.
+    """
+    found = {}
+    pending = list(agents)
+    while pending:
+        agent = pending.pop()
+        if id(agent) in found:
+            continue
+        found[id(agent)] = agent
+        pending.extend(handoff for handoff in agent.handoffs if isinstance(handoff, Agent))
+    return list(found.values())
+
+
+def install_scripted_model(
+    agents: Iterable[Agent],
+    scripts: Dict[str, List[Dict]],
+    latency: float = 0.5,
+    jitter: float = 0.0,
+    tokens_per_second: float = 0.0,
+    seed: int = 0,
+) -> ScriptedModelProvider:
+    """
+    Make agents answer from scripts instead of OpenAI.
+
+    The model is set on every agent (agents used as tools start their own runs
+    without our RunConfig, so a provider alone would not reach them) and
+    tracing is disabled since there is nothing to export offline. Pass every
+    agent of the workflow, including the ones only used through as_tool.
+    """
+    agents = collect_agents(agents)
+    model = ScriptedModel(
+        scripts, agents, latency=latency, jitter=jitter, tokens_per_second=tokens_per_second, seed=seed
+    )
+    for agent in agents:
+        agent.model = model
+    set_tracing_disabled(True)
+    return ScriptedModelProvider(model)
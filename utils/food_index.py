@@ -0,0 +1,186 @@
+import itertools
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from utils.chroma_ingest import stable_record_id
+
+DEFAULT_CSV_PATH = "data/calories.csv"
+
+
+def normalize_food_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def food_record_id(name: str, category: str, seen: Dict[str, int]) -> str:
+    """
+    nutrition_db id of a food: a hash of its normalized name and category.
+    """
+    return stable_record_id("food", f"{normalize_food_name(name)}|{normalize_food_name(category)}", seen)
+
+
+def _trigrams(name: str) -> set:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _singular_forms(name: str) -> List[str]:
+    """
+    The name itself plus naive singulars ("bananas" -> "banana", "peaches" -> "peach").
+    """
+    forms = [name]
+    if name.endswith("es"):
+        forms.append(name[:-2])
+    if name.endswith("s"):
+        forms.append(name[:-1])
+    return forms
+
+
+def load_food_metadatas(csv_path: str = DEFAULT_CSV_PATH) -> List[Dict]:
+    """
+    Read calories.csv into the same metadata dicts that are stored in nutrition_db.
+    """
+    import pandas as pd  # imported here so that importing the agents stays cheap
+
+    df = pd.read_csv(csv_path)
+    calories = df["Cals_per100grams"].astype(str).str.replace(" cal", "", regex=False)
+    kilojoules = df["KJ_per100grams"].astype(str).str.replace(" kJ", "", regex=False)
+    columns = {
+        "food_item": df["FoodItem"].astype(str).str.lower(),
+        "food_category": df["FoodCategory"].astype(str).str.lower(),
+        "calories_per_100g": pd.to_numeric(calories, errors="coerce").fillna(0).astype(float),
+        "kj_per_100g": pd.to_numeric(kilojoules, errors="coerce").fillna(0).astype(float),
+        "serving_info": df["per100grams"],
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*(column.tolist() for column in columns.values()))]
+
+
+class FoodNameIndex:
+    """
+    In-memory index of the food names in calories.csv.
+
+    search() answers an exact name or the same words in any order, so
+    "Applesauce", "bananas" or "bread brown" resolve without touching the vector
+    store. Anything looser, like "bread" for the many breads, is left to vector
+    search; search_fuzzy() (trigram matches such as "bannana") is only a
+    fallback for when that finds nothing.
+    """
+
+    def __init__(self, metadatas: List[Dict], min_similarity: float = 0.6):
+        self.min_similarity = min_similarity
+        self._rows = metadatas
+
+        self._exact = defaultdict(list)
+        for row_number, metadata in enumerate(metadatas):
+            self._exact[normalize_food_name(metadata["food_item"])].append(row_number)
+
+        self._sorted_names = sorted(self._exact)
+        self._words = frozenset(word for name in self._sorted_names for word in name.split())
+        self._by_words = defaultdict(list)
+        for name in self._sorted_names:
+            self._by_words[tuple(sorted(name.split()))].append(name)
+
+        self._trigram_postings = defaultdict(list)
+        self._trigram_counts = {}
+        for name in self._sorted_names:
+            grams = _trigrams(name)
+            self._trigram_counts[name] = len(grams)
+            for gram in grams:
+                self._trigram_postings[gram].append(name)
+
+    @classmethod
+    def from_csv(cls, csv_path: str = DEFAULT_CSV_PATH) -> "FoodNameIndex":
+        return cls(load_food_metadatas(csv_path))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _rows_for(self, names: List[str], limit: int) -> List[Dict]:
+        rows = [self._rows[row_number] for name in names for row_number in self._exact[name]]
+        return rows[:limit]
+
+    def food_word(self, word: str) -> Optional[str]:
+        """
+        The naive singular of word, or word itself, if it occurs in a food name
+        ("bananas" -> "banana"), else None.
+        """
+        for form in reversed(_singular_forms(word.lower())):
+            if form in self._words:
+                return form
+        return None
+
+    def exact(self, query: str, limit: int = 3) -> List[Dict]:
+        name = normalize_food_name(query)
+        for form in _singular_forms(name):
+            if form in self._exact:
+                return self._rows_for([form], limit)
+        return []
+
+    def same_words(self, query: str, limit: int = 3) -> List[str]:
+        """
+        Names made of exactly the query's words in any order, allowing naive
+        plurals in the query ("breads brown" -> "brown bread").
+        """
+        words = normalize_food_name(query).split()
+        if not words or len(words) > 4:  # keeps the plural combinations small
+            return []
+        names = []
+        for forms in itertools.product(*(_singular_forms(word) for word in words)):
+            names.extend(self._by_words.get(tuple(sorted(forms)), ()))
+        return list(dict.fromkeys(names))[:limit]
+
+    def fuzzy(self, query: str, limit: int = 3) -> List[str]:
+        """
+        Names whose trigram Jaccard similarity with the query is at least min_similarity.
+        """
+        grams = _trigrams(normalize_food_name(query))
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigram_postings.get(gram, ()):
+                shared[candidate] += 1
+
+        scored = []
+        for candidate, overlap in shared.items():
+            similarity = overlap / (len(grams) + self._trigram_counts[candidate] - overlap)
+            if similarity >= self.min_similarity:
+                scored.append((similarity, candidate))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [candidate for _, candidate in scored[:limit]]
+
+    def search(self, query: str, limit: int = 3) -> List[Dict]:
+        """
+        Metadata rows for the query, or an empty list if the name index cannot
+        answer it confidently and the caller should fall back to vector search.
+        """
+        rows = self.exact(query, limit)
+        if rows:
+            return rows
+
+        # a name merely starting with the query ("bread" -> "bread flour") or
+        # spelled like it ("pear" -> "peas") is not confident; vector search ranks
+        # those better
+        names = self.same_words(query, limit)
+        return self._rows_for(names, limit)
+
+    def search_fuzzy(self, query: str, limit: int = 3) -> List[Dict]:
+        """
+        Metadata rows of the names spelled like the query, for when vector search found nothing.
+        """
+        return self._rows_for(self.fuzzy(query, limit), limit)
+
+
+_food_name_index: Optional[FoodNameIndex] = None
+_food_name_index_lock = threading.Lock()
+
+
+def food_name_index(csv_path: str = DEFAULT_CSV_PATH) -> FoodNameIndex:
+    """
+    Process-wide index, built from calories.csv on first use.
+    """
+    global _food_name_index
+    if _food_name_index is None:
+        with _food_name_index_lock:
+            if _food_name_index is None:
+                _food_name_index = FoodNameIndex.from_csv(csv_path)
+    return _food_name_index
@@ -0,0 +1,137 @@
+import re
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.food_index import DEFAULT_CSV_PATH, load_food_metadatas
+
+SORT_COLUMNS = ("calories", "kj", "name")
+
+
+def _category_key(category: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", category.lower())
+
+
+class FoodTable:
+    """
+    calories.csv as columns: numpy arrays for the numbers and a category index
+    (category -> row numbers), so filter, sort and top-k questions such as
+    "lowest-calorie fruits" are a few vectorized operations instead of a vector search.
+    """
+
+    def __init__(self, metadatas: List[Dict]):
+        self.names = np.array([metadata["food_item"] for metadata in metadatas], dtype=object)
+        self.categories = np.array([metadata["food_category"] for metadata in metadatas], dtype=object)
+        self.calories = np.array([metadata["calories_per_100g"] for metadata in metadatas], dtype=np.float32)
+        self.kilojoules = np.array([metadata["kj_per_100g"] for metadata in metadatas], dtype=np.float32)
+
+        self.category_rows: Dict[str, np.ndarray] = {
+            category: np.flatnonzero(self.categories == category) for category in sorted(set(self.categories))
+        }
+        self._category_keys = {_category_key(category): category for category in self.category_rows}
+
+    @classmethod
+    def from_csv(cls, csv_path: str = DEFAULT_CSV_PATH) -> "FoodTable":
+        return cls(load_food_metadatas(csv_path))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def match_categories(self, category: str) -> List[str]:
+        """
+        Stored categories meant by a user's category name: every category whose
+        name contains it, ignoring case and punctuation. "Canned Fruit" is just
+        cannedfruit while "fruits" also covers tropical&exoticfruits; a plural
+        that matches nothing is retried as a singular.
+        """
+        key = _category_key(category)
+        for form in (key, key[:-1] if key.endswith("s") else key):
+            matches = [name for stored_key, name in self._category_keys.items() if form and form in stored_key]
+            if matches:
+                return matches
+        return []
+
+    def query(
+        self,
+        categories: Optional[List[str]] = None,
+        min_calories: Optional[float] = None,
+        max_calories: Optional[float] = None,
+        sort_by: str = "calories",
+        descending: bool = False,
+        limit: int = 10,
+    ) -> List[Dict]:
+        """
+        Rows in any of the given (stored) categories with calories per 100g in
+        [min_calories, max_calories], sorted by sort_by and cut to limit.
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"sort_by must be one of {SORT_COLUMNS}, got {sort_by!r}")
+
+        limit = max(1, limit)
+        if categories is None:
+            rows = np.arange(len(self.names))
+        else:
+            rows = np.concatenate([np.array([], dtype=np.int64)] + [self.category_rows[category] for category in categories])
+        if min_calories is not None:
+            rows = rows[self.calories[rows] >= min_calories]
+        if max_calories is not None:
+            rows = rows[self.calories[rows] <= max_calories]
+
+        if sort_by == "name":
+            order = np.argsort(self.names[rows], kind="stable")
+            rows = rows[order[::-1] if descending else order][:limit]
+        else:
+            values = self.calories[rows] if sort_by == "calories" else self.kilojoules[rows]
+            keys = -values if descending else values
+            if len(rows) > limit:
+                # only the top-k need sorting
+                top = np.argpartition(keys, limit - 1)[:limit]
+                rows, keys = rows[top], keys[top]
+            rows = rows[np.lexsort((self.names[rows].astype(str), keys))]
+
+        return [
+            {
+                "food_item": self.names[row],
+                "food_category": self.categories[row],
+                "calories_per_100g": float(self.calories[row]),
+                "kj_per_100g": float(self.kilojoules[row]),
+            }
+            for row in rows
+        ]
+
+
+def calorie_filter_where(
+    categories: Optional[List[str]] = None,
+    min_calories: Optional[float] = None,
+    max_calories: Optional[float] = None,
+) -> Optional[Dict]:
+    """
+    The same filter as FoodTable.query as a chroma where clause on the nutrition_db metadata.
+    """
+    clauses = []
+    if categories is not None:
+        clauses.append({"food_category": {"$in": list(categories)}})
+    if min_calories is not None:
+        clauses.append({"calories_per_100g": {"$gte": float(min_calories)}})
+    if max_calories is not None:
+        clauses.append({"calories_per_100g": {"$lte": float(max_calories)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+_food_table: Optional[FoodTable] = None
+_food_table_lock = threading.Lock()
+
+
+def food_table(csv_path: str = DEFAULT_CSV_PATH) -> FoodTable:
+    """
+    Process-wide table, loaded from calories.csv on first use.
+    """
+    global _food_table
+    if _food_table is None:
+        with _food_table_lock:
+            if _food_table is None:
+                _food_table = FoodTable.from_csv(csv_path)
+    return _food_table
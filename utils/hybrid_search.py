@@ -0,0 +1,86 @@
+from typing import Dict, List, Sequence, Tuple
+
+from utils.embedding_cache import query_with_cache
+from utils.lexical_index import lexical_index, tokenize
+from utils.metrics import timer
+
+# vector: embeddings only, lexical: BM25 only, hybrid: both fused with reciprocal rank fusion
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+DEFAULT_SEARCH_MODE = "vector"  # hybrid and lexical are opt-in
+RRF_K = 60  # the usual constant; damps the influence of the very top ranks
+CANDIDATES_PER_RESULT = 4  # each ranking contributes this many candidates per requested result
+MAX_KEYWORD_TERMS = 2  # longer queries always get a vector search in hybrid mode
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """
+    Merge rankings of ids by summing 1 / (k + rank) over every ranking an id appears in.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, record_id in enumerate(ranking, start=1):
+            scores[record_id] = scores.get(record_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda record_id: -scores[record_id])
+
+
+def is_keyword_match(query: str, hits: List[Tuple[str, float, float]]) -> bool:
+    """
+    A query is answered lexically alone when it names a single thing, like
+    "oatmeal" or "brown bread", and its best document contains every one of its
+    terms. Longer natural-language questions are not: the Q&A keywords hold every
+    word of a question and its answer, so full coverage says little about them.
+    """
+    return bool(hits) and hits[0][2] == 1.0 and len(set(tokenize(query))) <= MAX_KEYWORD_TERMS
+
+
+def hybrid_query(collection, query_texts: List[str], n_results: int, mode: str = DEFAULT_SEARCH_MODE) -> Dict:
+    """
+    Drop-in for query_with_cache that returns {"ids", "metadatas", "documents"},
+    one list per query text, searched the way mode says.
+
+    In hybrid mode short keyword queries the BM25 index matches completely (see
+    is_keyword_match) skip the embedding step; the rest are embedded and searched together in one vector query and
+    their vector and lexical rankings are fused.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}, expected one of {SEARCH_MODES}")
+    if mode == "vector":
+        return query_with_cache(collection, query_texts, n_results=n_results, include=["metadatas", "documents"])
+
+    depth = n_results * CANDIDATES_PER_RESULT
+    index = lexical_index(collection)
+    with timer("retrieval_stage_seconds", stage="lexical", collection=collection.name):
+        lexical_hits = [index.search(text, depth) for text in query_texts]
+
+    rankings: List[List[str]] = [[hit[0] for hit in hits][:n_results] for hits in lexical_hits]
+    records: Dict[str, Tuple[Dict, str]] = {}
+
+    if mode == "hybrid":
+        needs_vectors = [
+            i for i, hits in enumerate(lexical_hits) if not is_keyword_match(query_texts[i], hits)
+        ]
+        if needs_vectors:
+            results = query_with_cache(
+                collection,
+                [query_texts[i] for i in needs_vectors],
+                n_results=depth,
+                include=["metadatas", "documents"],
+            )
+            for i, ids, metadatas, documents in zip(
+                needs_vectors, results["ids"], results["metadatas"], results["documents"]
+            ):
+                records.update(zip(ids, zip(metadatas, documents)))
+                lexical_ranking = [hit[0] for hit in lexical_hits[i]]
+                rankings[i] = reciprocal_rank_fusion([ids, lexical_ranking])[:n_results]
+
+    missing = list({record_id for ranking in rankings for record_id in ranking if record_id not in records})
+    if missing:
+        found = collection.get(ids=missing, include=["metadatas", "documents"])
+        records.update(zip(found["ids"], zip(found["metadatas"], found["documents"])))
+
+    rankings = [[record_id for record_id in ranking if record_id in records] for ranking in rankings]
+    return {
+        "ids": rankings,
+        "metadatas": [[records[record_id][0] for record_id in ranking] for ranking in rankings],
+        "documents": [[records[record_id][1] for record_id in ranking] for ranking in rankings],
+    }
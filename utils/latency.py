@@ -0,0 +1,15 @@
+import math
+from typing import Dict, Iterable, Sequence
+
+
+def percentiles(values: Iterable[float], points: Sequence[float] = (50, 90, 95, 99)) -> Dict[str, float]:
+    """
+    Nearest-rank percentiles, e.g. {"p50": ..., "p95": ...}. Empty input gives zeros.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {f"p{point:g}": 0.0 for point in points}
+    return {
+        f"p{point:g}": ordered[max(0, math.ceil(point / 100 * len(ordered)) - 1)]
+        for point in points
+    }
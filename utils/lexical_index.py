@@ -0,0 +1,201 @@
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.chroma_ingest import DEFAULT_BATCH_SIZE, collection_version_path
+
+LEXICAL_INDEX_DIR = os.path.join("chroma", "lexical_index")
+
+# words that say nothing about which food or answer is meant
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from how i in is it many much my of on or should
+    than that the there this to was what when which who why with you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase alphanumeric terms without stopwords. Underscores split terms, so the
+    food keywords ("canned_apricots cannedfruit") tokenize like plain text.
+    """
+    return [term for term in re.findall(r"[a-z0-9]+", text.lower()) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over one text field per document.
+
+    Postings are stored in flat arrays (CSR layout): the documents containing
+    term number t are doc_ids[offsets[t]:offsets[t + 1]], with their term
+    frequencies at the same positions in term_freqs. Terms are kept sorted so a
+    term's number is a binary search away and the whole index is a handful of
+    numpy arrays that save to and load from one .npz file.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        version: str = "",
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.ids = list(ids)
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.version = version
+        self.k1 = k1
+        self.b = b
+
+        document_frequency = np.diff(offsets).astype(np.float32)
+        self.idf = np.log1p((len(self.ids) - document_frequency + 0.5) / (document_frequency + 0.5))
+        self.average_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(cls, ids: Sequence[str], texts: Sequence[str], version: str = "") -> "BM25Index":
+        counts = [Counter(tokenize(text)) for text in texts]
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, counter in enumerate(counts):
+            for term, frequency in counter.items():
+                postings.setdefault(term, []).append((doc_id, frequency))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        flat = [posting for term in terms for posting in postings[term]]
+        doc_ids = np.fromiter((doc_id for doc_id, _ in flat), dtype=np.int32, count=len(flat))
+        term_freqs = np.fromiter((frequency for _, frequency in flat), dtype=np.float32, count=len(flat))
+        doc_lengths = np.array([sum(counter.values()) for counter in counts], dtype=np.float32)
+        return cls(ids, np.array(terms, dtype=str), offsets, doc_ids, term_freqs, doc_lengths, version)
+
+    @classmethod
+    def from_collection(
+        cls, collection, field: str = "keywords", version: str = "", page_size: int = DEFAULT_BATCH_SIZE
+    ) -> "BM25Index":
+        """
+        Index the given metadata field of every record in a chroma collection.
+        """
+        ids, texts = [], []
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(limit=page_size, offset=offset, include=["metadatas"])
+            ids.extend(page["ids"])
+            texts.extend(str((metadata or {}).get(field, "")) for metadata in page["metadatas"])
+        return cls.build(ids, texts, version)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(
+                file,
+                ids=np.array(self.ids, dtype=str),
+                terms=self.terms,
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                term_freqs=self.term_freqs,
+                doc_lengths=self.doc_lengths,
+                version=np.array(self.version),
+            )
+        os.replace(temporary_path, path)  # readers never see a half-written index
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as arrays:
+            return cls(
+                arrays["ids"].tolist(),
+                arrays["terms"],
+                arrays["offsets"],
+                arrays["doc_ids"],
+                arrays["term_freqs"],
+                arrays["doc_lengths"],
+                str(arrays["version"]),
+            )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _term_number(self, term: str) -> Optional[int]:
+        position = int(np.searchsorted(self.terms, term))
+        if position < len(self.terms) and self.terms[position] == term:
+            return position
+        return None
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float, float]]:
+        """
+        Best matching documents as (id, score, coverage) tuples, where coverage
+        is the share of the query's terms the document contains.
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms or not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        matched = np.zeros(len(self.ids), dtype=np.int32)
+        for term in query_terms:
+            number = self._term_number(term)
+            if number is None:
+                continue
+            start, end = self.offsets[number], self.offsets[number + 1]
+            documents = self.doc_ids[start:end]
+            frequencies = self.term_freqs[start:end]
+            length_norm = 1 - self.b + self.b * self.doc_lengths[documents] / self.average_length
+            scores[documents] += self.idf[number] * frequencies * (self.k1 + 1) / (frequencies + self.k1 * length_norm)
+            matched[documents] += 1
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [(self.ids[i], float(scores[i]), matched[i] / len(query_terms)) for i in ranked]
+
+
+def lexical_index_path(collection_name: str) -> str:
+    return os.path.join(LEXICAL_INDEX_DIR, f"{collection_name}.npz")
+
+
+def _collection_version(collection_name: str) -> str:
+    try:
+        return str(os.stat(collection_version_path(collection_name)).st_mtime_ns)
+    except FileNotFoundError:
+        return ""
+
+
+_indexes: Dict[str, BM25Index] = {}
+_indexes_lock = threading.Lock()
+
+
+def lexical_index(collection) -> BM25Index:
+    """
+    Process-wide BM25 index over the keywords metadata of a collection.
+    It is loaded from chroma/lexical_index if that copy matches the collection's
+    version, and otherwise rebuilt from the collection and saved there, so
+    re-ingesting a collection rebuilds its index on next use.
+    """
+    version = _collection_version(collection.name)
+    index = _indexes.get(collection.name)
+    if index is not None and index.version == version:
+        return index
+
+    with _indexes_lock:
+        index = _indexes.get(collection.name)
+        if index is None or index.version != version:
+            path = lexical_index_path(collection.name)
+            index = BM25Index.load(path) if os.path.exists(path) else None
+            if index is None or index.version != version:
+                index = BM25Index.from_collection(collection, version=version)
+                index.save(path)
+            _indexes[collection.name] = index
+    return index
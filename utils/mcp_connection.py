@@ -0,0 +1,259 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict, Iterable, Optional
+
+from agents.exceptions import UserError
+from agents.mcp import MCPServerStreamableHttp
+from mcp.types import CallToolResult
+
+from utils.app_config import AppConfig
+from utils.metrics import metrics
+from utils.search_cache import SearchResponseCache, search_response_cache
+
+
+class PersistentMCPServer(MCPServerStreamableHttp):
+    """
+    Streamable HTTP MCP server that stays connected for the life of the process.
+
+    A background task owns the session: it connects (retrying with exponential
+    backoff), pings the server while idle so the session stays warm, and
+    reconnects when a call fails or a ping goes unanswered. The transport has to
+    be opened and closed from the same task, which is why callers never connect
+    or clean up the session themselves. connect() is idempotent, so every agent
+    run and script can call it; concurrent runs share the one session.
+
+    With a response_cache, successful results of the cached_tools are stored by
+    their "query" argument and repeated searches never leave the process.
+    """
+
+    def __init__(
+        self,
+        *args,
+        reconnect_attempts: int = 5,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 10.0,
+        keepalive_seconds: float = 30.0,
+        response_cache: Optional[SearchResponseCache] = None,
+        cached_tools: Iterable[str] = (),
+        **kwargs,
+    ):
+        kwargs.setdefault("max_retry_attempts", 0)  # failures are handled by reconnecting instead
+        super().__init__(*args, **kwargs)
+        self.reconnect_attempts = reconnect_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.response_cache = response_cache
+        self.cached_tools = set(cached_tools)
+
+        self.connects = 0
+        self.reconnects = 0
+
+        self._owner: Optional[asyncio.Task] = None
+        self._holder: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._generation = 0
+        self._session_lost = asyncio.Event()
+
+    async def connect(self):
+        if self._owner is None or self._owner.done():
+            self._closing = False
+            self._error = None
+            self._ready.clear()
+            self._wake.clear()
+            self._owner = asyncio.create_task(self._own_session(), name=f"{self.name} session")
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def cleanup(self):
+        if asyncio.current_task() is self._holder or self._owner is None:
+            # the holder task closing its own transport (also used by connect() on failure)
+            await super().cleanup()
+            return
+        self._closing = True
+        self._wake.set()
+        await asyncio.gather(self._owner, return_exceptions=True)
+        self._owner = None
+
+    async def _own_session(self) -> None:
+        """
+        Keep a session open until cleanup(), starting a new one whenever it breaks.
+        """
+        failures = 0
+        try:
+            while not self._closing:
+                generation = self._generation
+                holder = asyncio.create_task(self._hold_session(), name=f"{self.name} session")
+                try:
+                    await asyncio.wait([holder])
+                except asyncio.CancelledError:
+                    holder.cancel()
+                    raise
+
+                if self._generation != generation:
+                    # the session was up and has ended: closed by us or dropped
+                    failures = 0
+                    if not self._closing:
+                        self.reconnects += 1
+                    continue
+
+                # a refused connection can end the holder with a cancellation leaked
+                # from the transport's task group instead of an exception
+                error = None if holder.cancelled() else holder.exception()
+                error = error or ConnectionError(f"could not connect to {self.name}")
+                if failures == self.reconnect_attempts:
+                    raise error
+                delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** failures)
+                delay *= random.uniform(0.5, 1.0)  # jitter so parallel processes don't retry in lockstep
+                print(f"{self.name}: connect failed ({error!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                failures += 1
+        except BaseException as e:
+            # wake up everyone waiting for a session instead of leaving them hanging
+            self._error = e if isinstance(e, Exception) else ConnectionError(f"{self.name} session closed")
+            self._ready.set()
+            if not isinstance(e, Exception):
+                raise
+
+    async def _hold_session(self) -> None:
+        """
+        One session from connect to cleanup, all in this task as the transport requires.
+        """
+        self._holder = asyncio.current_task()
+        # a fresh stack, so leftovers of a failed attempt are never closed from this task
+        self.exit_stack = AsyncExitStack()
+        await super().connect()
+        self.connects += 1
+        self._generation += 1
+        self._session_lost = asyncio.Event()
+        self._ready.set()
+        try:
+            await self._wait_until_reconnect_needed()
+        finally:
+            self._ready.clear()
+            self._session_lost.set()
+            await super().cleanup()
+
+    async def _wait_until_reconnect_needed(self) -> None:
+        while not self._closing and not self._wake.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.keepalive_seconds)
+            except asyncio.TimeoutError:
+                try:
+                    await asyncio.wait_for(self.session.send_ping(), timeout=self.client_session_timeout_seconds)
+                except Exception as e:
+                    print(f"{self.name}: keepalive ping failed ({e!r}), reconnecting")
+                    return
+        self._wake.clear()
+
+    async def _live_session(self):
+        if self._owner is None:
+            raise UserError("Server not initialized. Make sure you call `connect()` first.")
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.session, self._generation, self._session_lost
+
+    async def _reconnect(self, generation: int) -> None:
+        # several runs can see the same broken session; only the first asks for a new one
+        if generation == self._generation and self._ready.is_set():
+            self._ready.clear()
+            self._wake.set()
+        await self._live_session()
+
+    async def _unless_lost(self, request, session_lost: asyncio.Event):
+        """
+        Await a request, failing as soon as its session drops rather than after the timeout.
+        """
+        call = asyncio.ensure_future(request)
+        watcher = asyncio.ensure_future(session_lost.wait())
+        try:
+            await asyncio.wait({call, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        finally:
+            watcher.cancel()
+        if not call.done():
+            call.cancel()
+            raise ConnectionError(f"{self.name} session lost")
+        return call.result()
+
+    async def _call_with_reconnect(self, description: str, request):
+        """
+        Run request(session) on the shared session; if that fails, reconnect and try once more.
+        """
+        session, generation, session_lost = await self._live_session()
+        try:
+            return await self._unless_lost(request(session), session_lost)
+        except UserError:
+            raise
+        except Exception as e:
+            print(f"{self.name}: {description} failed ({e!r}), reconnecting")
+            await self._reconnect(generation)
+            session, _, session_lost = await self._live_session()
+            return await self._unless_lost(request(session), session_lost)
+
+    async def list_tools(self, run_context=None, agent=None):
+        parent = super()
+        return await self._call_with_reconnect(
+            "list_tools", lambda session: parent.list_tools(run_context, agent)
+        )
+
+    async def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]]):
+        arguments = arguments or {}
+        cacheable = self.response_cache is not None and tool_name in self.cached_tools and "query" in arguments
+        labels = {"server": self.name, "tool": tool_name}
+        start = time.perf_counter()
+        if cacheable:
+            query = arguments["query"]
+            options = {"tool": tool_name, **{k: v for k, v in arguments.items() if k != "query"}}
+            cached = self.response_cache.get(self.name, query, options)
+            if cached is not None:
+                metrics().observe("mcp_call_seconds", time.perf_counter() - start, cache="hit", **labels)
+                return CallToolResult.model_validate_json(cached)
+
+        result = await self._call_with_reconnect(
+            tool_name, lambda session: session.call_tool(tool_name, arguments)
+        )
+        seconds = time.perf_counter() - start
+        metrics().observe("mcp_call_seconds", seconds, cache="miss", **labels)
+        if cacheable and not result.isError:
+            self.response_cache.put(self.name, query, result.model_dump_json(), options, fetch_seconds=seconds)
+        return result
+
+    def stats(self) -> Dict:
+        return {"connects": self.connects, "reconnects": self.reconnects, "connected": self.session is not None}
+
+
+_servers: Dict[str, PersistentMCPServer] = {}
+_servers_lock = threading.Lock()
+
+
+def exa_search_server() -> PersistentMCPServer:
+    """
+    Process-wide Exa search MCP server shared by every agent that searches the web.
+    Search results are cached on disk (see utils/search_cache.py).
+    Set EXA_MCP_URL to point it at another server, e.g. benchmarks/exa_mcp_stub.py.
+    """
+    with _servers_lock:
+        if "exa" not in _servers:
+            _servers["exa"] = PersistentMCPServer(
+                name="Exa Search MCP",
+                params={
+                    "url": AppConfig().get_exa_mcp_url(),
+                    "timeout": 30,
+                },
+                client_session_timeout_seconds=30,
+                cache_tools_list=True,
+                response_cache=search_response_cache(),
+                cached_tools=("web_search_exa",),
+            )
+        return _servers["exa"]
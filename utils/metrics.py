@@ -0,0 +1,231 @@
+import atexit
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+from utils.latency import percentiles
+
+# seconds; spans cache hits (microseconds) to full agent runs (a minute)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT_SAMPLES = 10_000
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Prometheus-style histogram (cumulative buckets, sum, count) that also keeps
+    the most recent samples for exact percentiles in the JSON export.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+                break
+
+    def cumulative_counts(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            total += count
+            yield bound, total
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            **percentiles(self.recent),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of latency histograms, one per (metric name, labels),
+    and of gauges (set_gauge, record_cache_stats) for point-in-time values.
+    Use timer() around a block or @timed on a sync or async function, then export
+    with to_prometheus()/to_json() or write(path).
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = float(value)
+
+    def record_cache_stats(self, cache: str, stats: Dict) -> None:
+        """
+        One cache_<stat>{cache="..."} gauge per numeric value of a cache's stats().
+        """
+        for stat, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.set_gauge(f"cache_{stat}", value, cache=cache)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels):
+        """
+        Decorator recording how long each call of a sync or async function takes.
+        """
+
+        def decorator(function):
+            if inspect.iscoroutinefunction(function):
+
+                @functools.wraps(function)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(name, **labels):
+                        return await function(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._gauges.clear()
+
+    def to_json(self) -> Dict:
+        with self._lock:
+            exported = {
+                name: [{"labels": dict(labels), **histogram.summary()} for labels, histogram in series.items()]
+                for name, series in sorted(self._histograms.items())
+            }
+            for name, series in sorted(self._gauges.items()):
+                exported[name] = [{"labels": dict(labels), "value": value} for labels, value in series.items()]
+            return exported
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in series.items():
+                    for bound, count in histogram.cumulative_counts():
+                        lines.append(f"{name}_bucket{_format_labels(labels, le=f'{bound:g}')} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.9g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """
+        Export to path: Prometheus text format for .prom/.txt, JSON otherwise.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            if path.endswith((".prom", ".txt")):
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), file, indent=2)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, **extra) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{label}="{_escape_label_value(str(value))}"' for label, value in pairs) + "}"
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def metrics() -> MetricsRegistry:
+    """
+    Process-wide registry. If METRICS_OUT is set, it is written there on exit,
+    so any script can be measured without code changes.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+                metrics_out = os.getenv("METRICS_OUT")
+                if metrics_out:
+                    atexit.register(_registry.write, metrics_out)
+    return _registry
+
+
+def timer(name: str, **labels):
+    return metrics().timer(name, **labels)
+
+
+def timed(name: str, **labels):
+    return metrics().timed(name, **labels)
+
+
+@contextmanager
+def profiled(path: Optional[str] = None, top: int = 25):
+    """
+    cProfile the block. Stats are saved to path (for snakeviz or pstats) if
+    given and the top functions by cumulative time are printed. Only the
+    calling thread is profiled, not the retrieval thread pool.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            profiler.dump_stats(path)
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(top)
+        print(output.getvalue(), file=sys.stderr)
@@ -0,0 +1,123 @@
+from typing import List, Literal, Optional
+
+from agents import function_tool
+from pydantic import BaseModel
+
+from utils.metrics import timed
+from utils.retrieval_service import RetrievalService
+
+# The tools are async and run their chroma queries on the retrieval thread pool,
+# so several tool calls from one model turn (or several agent sessions) overlap
+# instead of blocking the event loop one after another.
+# Each call is timed into the tool_seconds histogram (see utils/metrics.py).
+
+
+@function_tool
+@timed("tool_seconds", tool="calorie_lookup_tool")
+async def calorie_lookup_tool(query: str, max_results: int = 3) -> str:
+    """
+    Tool function for a RAG database to look up calorie information for specific food items, but not for meals.
+
+    Args:
+        query: The food item to look up.
+        max_results: The maximum number of results to return.
+
+    Returns:
+        A string containing the nutrition information.
+    """
+
+    return await RetrievalService().alookup_calories(query, max_results)
+
+
+@function_tool
+@timed("tool_seconds", tool="calorie_batch_lookup_tool")
+async def calorie_batch_lookup_tool(food_items: List[str], max_results: int = 3) -> str:
+    """
+    Tool function for a RAG database to look up calorie information for several food items in one call,
+    e.g. all the ingredients of a meal.
+
+    Args:
+        food_items: The food items to look up.
+        max_results: The maximum number of results to return per food item.
+
+    Returns:
+        A string containing the nutrition information for every food item.
+    """
+
+    return await RetrievalService().alookup_calories_batch(food_items, max_results)
+
+
+class MealIngredient(BaseModel):
+    name: str
+    grams: float
+
+
+@function_tool
+@timed("tool_seconds", tool="meal_calories_tool")
+async def meal_calories_tool(ingredients: List[MealIngredient]) -> str:
+    """
+    Tool function to calculate the calories of a whole meal from its ingredients and their weights.
+    It looks up every ingredient and adds up the calories, so there is no need to look them up one by one
+    or to do the arithmetic yourself.
+
+    Args:
+        ingredients: Every ingredient of one serving with its weight in grams, e.g. {"name": "rolled oats", "grams": 40}.
+
+    Returns:
+        A table with the matched food, grams, kcal and kJ of every ingredient and the meal total.
+    """
+
+    return await RetrievalService().alookup_meal_calories(
+        [(ingredient.name, ingredient.grams) for ingredient in ingredients]
+    )
+
+
+@function_tool
+@timed("tool_seconds", tool="nutrtition_qna_tool")
+async def nutrtition_qna_tool(query: str, max_results: int = 3) -> str:
+    """
+    Tool function to ask a question about nutrition.
+
+    Args:
+        query: The question to ask
+        max_results: The maximum number of results to return.
+
+    Returns:
+        A string containing the question and the answer related to the query.
+    """
+
+    return await RetrievalService().alookup_nutrition_qna(query, max_results)
+
+
+@function_tool
+@timed("tool_seconds", tool="food_filter_tool")
+async def food_filter_tool(
+    category: Optional[str] = None,
+    min_calories: Optional[float] = None,
+    max_calories: Optional[float] = None,
+    sort_by: Literal["calories", "kj", "name"] = "calories",
+    descending: bool = False,
+    limit: int = 10,
+    query: Optional[str] = None,
+) -> str:
+    """
+    Tool function to filter, sort and rank the foods in the calorie database by their numbers,
+    e.g. the lowest-calorie fruits or foods under 50 calories in CannedFruit.
+
+    Args:
+        category: Food category to keep, e.g. "CannedFruit", "Vegetables" or a broader word like "fruits".
+        min_calories: Keep foods with at least this many calories per 100g.
+        max_calories: Keep foods with at most this many calories per 100g.
+        sort_by: Column to sort by: calories, kj or name.
+        descending: Sort from highest to lowest instead.
+        limit: The maximum number of foods to return, at most 50.
+        query: Optional description of the food, e.g. "breakfast cereal"; results are then ranked by
+            similarity to it within the filter instead of by sort_by.
+
+    Returns:
+        A string listing the matching foods with their category and calories per 100g.
+    """
+
+    return await RetrievalService().alookup_foods(
+        query, category, min_calories, max_calories, sort_by, descending, limit
+    )
@@ -0,0 +1,36 @@
+from utils.calorie_lookup import normalize_query
+from utils.chroma_ingest import collection_version_path
+from utils.hybrid_search import DEFAULT_SEARCH_MODE, hybrid_query
+from utils.metrics import timer
+from utils.query_cache import QueryResultCache
+from utils.result_formatter import format_qna_results, token_savings
+
+nutrition_qna_cache = QueryResultCache(
+    max_entries=1024,
+    ttl_seconds=600,
+    version_file=collection_version_path("nutrition_qna"),
+)
+
+
+def lookup_nutrition_qna(collection, query: str, max_results: int = 3, mode: str = DEFAULT_SEARCH_MODE) -> str:
+    """
+    Search the nutrition_qna collection for Q&A pairs related to the query.
+    Answers are formatted to the token budget of utils/result_formatter.py.
+    """
+    key = (normalize_query(query), max_results)
+    with timer("retrieval_stage_seconds", stage="result_cache"):
+        cached = nutrition_qna_cache.get(key)
+    if cached is not None:
+        return cached
+
+    results = hybrid_query(collection, [query], n_results=max_results, mode=mode)
+
+    if not results["documents"][0]:
+        return f"No information found for: {query}"
+
+    # Format results for the agent: compact snippets from the metadata, not the rendered documents
+    formatted = format_qna_results(results["metadatas"][0])
+    full = "Related answers to your question:\n" + "\n".join(results["documents"][0])
+    token_savings().record("nutrition_qna", full, formatted)
+    nutrition_qna_cache.put(key, formatted)
+    return formatted
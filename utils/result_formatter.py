@@ -0,0 +1,122 @@
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# per tool result; RESULT_TOKEN_BUDGET overrides it
+DEFAULT_TOKEN_BUDGET = int(os.getenv("RESULT_TOKEN_BUDGET", "400"))
+MAX_ANSWER_TOKENS = 120
+NEAR_DUPLICATE_SIMILARITY = 0.8
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about 4 characters per token for English), good enough
+    to budget prompts without a tokenizer dependency.
+    """
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to about max_tokens, at the last sentence end or word boundary that fits.
+    """
+    text = " ".join(text.split())
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    sentence_end = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if sentence_end > max_chars // 2:
+        return cut[:sentence_end + 1]
+    return cut.rsplit(" ", 1)[0] + " ..."
+
+
+def _words(text: str) -> frozenset:
+    return frozenset(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def is_near_duplicate(words: frozenset, seen: Iterable[frozenset], threshold: float = NEAR_DUPLICATE_SIMILARITY) -> bool:
+    for other in seen:
+        union = len(words | other)
+        if union and len(words & other) / union >= threshold:
+            return True
+    return False
+
+
+def pack_lines(header: str, lines: Iterable[str], token_budget: int) -> str:
+    """
+    header plus as many lines as fit in token_budget (always at least one line).
+    """
+    packed = [header]
+    used = estimate_tokens(header)
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if len(packed) > 1 and used + cost > token_budget:
+            break
+        packed.append(line)
+        used += cost
+    return "\n".join(packed)
+
+
+def format_qna_results(
+    metadatas: List[Dict],
+    token_budget: Optional[int] = None,
+    max_answer_tokens: int = MAX_ANSWER_TOKENS,
+) -> str:
+    """
+    Q&A hits as question/answer snippets taken from the metadata instead of the
+    rendered documents: near-identical questions are dropped, long answers are
+    shortened and hits stop once the token budget is spent.
+    """
+    seen = []
+    lines = []
+    for metadata in metadatas:
+        words = _words(metadata["question"])
+        if is_near_duplicate(words, seen):
+            continue
+        seen.append(words)
+        lines.append(f"Q: {metadata['question']}\nA: {truncate_to_tokens(metadata['answer'], max_answer_tokens)}")
+    return pack_lines("Related answers to your question:", lines, token_budget or DEFAULT_TOKEN_BUDGET)
+
+
+class TokenSavings:
+    """
+    How many prompt tokens the compact formatting saved, per tool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Dict[str, int]] = {}
+
+    def record(self, tool: str, full_text: str, compact_text: str) -> None:
+        with self._lock:
+            totals = self._tools.setdefault(tool, {"calls": 0, "full_tokens": 0, "compact_tokens": 0})
+            totals["calls"] += 1
+            totals["full_tokens"] += estimate_tokens(full_text)
+            totals["compact_tokens"] += estimate_tokens(compact_text)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                tool: {
+                    **totals,
+                    "saved_tokens": totals["full_tokens"] - totals["compact_tokens"],
+                    "saved_per_call": (totals["full_tokens"] - totals["compact_tokens"]) / totals["calls"],
+                    "saved_ratio": 1 - totals["compact_tokens"] / totals["full_tokens"] if totals["full_tokens"] else 0.0,
+                }
+                for tool, totals in self._tools.items()
+            }
+
+
+_token_savings: Optional[TokenSavings] = None
+_token_savings_lock = threading.Lock()
+
+
+def token_savings() -> TokenSavings:
+    global _token_savings
+    if _token_savings is None:
+        with _token_savings_lock:
+            if _token_savings is None:
+                _token_savings = TokenSavings()
+    return _token_savings
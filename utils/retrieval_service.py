@@ -0,0 +1,137 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from utils.calorie_lookup import lookup_calories, lookup_calories_batch, lookup_foods, lookup_meal_calories
+from utils.embedding_cache import default_embedding_cache
+from utils.food_index import food_name_index
+from utils.food_table import food_table
+from utils.hybrid_search import DEFAULT_SEARCH_MODE
+from utils.lexical_index import lexical_index
+from utils.qna_lookup import lookup_nutrition_qna
+
+CHROMA_PATH = "chroma"
+DEFAULT_MAX_WORKERS = 8
+
+
+class RetrievalService:
+    """
+    Thread-safe Singleton that owns the one chroma client of the process.
+    The client and collections are opened on first use, so importing an agent
+    module does not touch the database.
+
+    The async lookups run on a bounded thread pool so a vector search never
+    blocks the event loop; set max_workers before the first async call to size it.
+    search_mode picks vector (default), lexical or hybrid search for the lookups.
+    """
+
+    _instance = None
+    _lock = threading.Lock()  # Lock object to synchronize threads
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(RetrievalService, cls).__new__(cls)
+                    cls._instance._init()
+        return cls._instance
+
+    def _init(self):
+        self._client = None
+        self._collections = {}
+        self._open_lock = threading.Lock()
+        self._executor = None
+        self.max_workers = DEFAULT_MAX_WORKERS
+        self.search_mode = DEFAULT_SEARCH_MODE
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._open_lock:
+                if self._client is None:
+                    import chromadb
+
+                    self._client = chromadb.PersistentClient(path=CHROMA_PATH)
+        return self._client
+
+    def collection(self, name: str):
+        collection = self._collections.get(name)
+        if collection is None:
+            client = self.client
+            with self._open_lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = client.get_collection(name=name)
+                    self._collections[name] = collection
+        return collection
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._open_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="retrieval"
+                    )
+        return self._executor
+
+    async def _run_in_executor(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    def warmup(self, collection_names: Iterable[str] = ("nutrition_db",)) -> None:
+        """
+        Pay the start-up costs up front: open the collections, load (or build) their
+        BM25 indexes when search_mode uses them, build the food name index and load
+        the embedding model, so the first tool call is as fast as the rest.
+        """
+        for name in collection_names:
+            collection = self.collection(name)
+            if self.search_mode != "vector":
+                lexical_index(collection)
+        food_name_index()
+        food_table()
+        default_embedding_cache().embedding_function(["warmup"])
+
+    def lookup_calories(self, query: str, max_results: int = 3) -> str:
+        return lookup_calories(self.collection("nutrition_db"), query, max_results, self.search_mode)
+
+    def lookup_calories_batch(self, food_items: List[str], max_results: int = 3) -> str:
+        return lookup_calories_batch(self.collection("nutrition_db"), food_items, max_results, self.search_mode)
+
+    def lookup_nutrition_qna(self, query: str, max_results: int = 3) -> str:
+        return lookup_nutrition_qna(self.collection("nutrition_qna"), query, max_results, self.search_mode)
+
+    def lookup_meal_calories(self, ingredients: Sequence[Tuple[str, float]]) -> str:
+        return lookup_meal_calories(self.collection("nutrition_db"), ingredients, self.search_mode)
+
+    def lookup_foods(
+        self,
+        query: Optional[str] = None,
+        category: Optional[str] = None,
+        min_calories: Optional[float] = None,
+        max_calories: Optional[float] = None,
+        sort_by: str = "calories",
+        descending: bool = False,
+        limit: int = 10,
+    ) -> str:
+        return lookup_foods(
+            self.collection("nutrition_db"), query, category, min_calories, max_calories, sort_by, descending, limit
+        )
+
+    async def alookup_calories(self, query: str, max_results: int = 3) -> str:
+        return await self._run_in_executor(self.lookup_calories, query, max_results)
+
+    async def alookup_calories_batch(self, food_items: List[str], max_results: int = 3) -> str:
+        return await self._run_in_executor(self.lookup_calories_batch, food_items, max_results)
+
+    async def alookup_nutrition_qna(self, query: str, max_results: int = 3) -> str:
+        return await self._run_in_executor(self.lookup_nutrition_qna, query, max_results)
+
+    async def alookup_meal_calories(self, ingredients: Sequence[Tuple[str, float]]) -> str:
+        return await self._run_in_executor(self.lookup_meal_calories, ingredients)
+
+    async def alookup_foods(self, *args, **kwargs) -> str:
+        return await self._run_in_executor(functools.partial(self.lookup_foods, *args, **kwargs))
@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join("chroma", "search_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # recipes and prices don't change by the hour
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    "How many calories in an English Breakfast?" and "how many calories in an english breakfast"
+    share a cache entry: lowercase, single spaces, no surrounding punctuation.
+    """
+    query = " ".join(query.lower().split())
+    return re.sub(r"^[^\w]+|[^\w]+$", "", query)
+
+
+class SearchResponseCache:
+    """
+    SQLite-backed cache of web search responses with TTL expiry.
+
+    Entries are keyed by (source, normalized query, other arguments), so every
+    process and every run of the agents shares what was fetched before. When
+    more than max_entries are stored the least recently used ones are dropped.
+    Hit, miss and expiry counters for this process are available from stats(),
+    together with the external fetch time the hits saved.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.seconds_saved = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads, so keep one per thread.
+        # The file is only opened (and created) on the first lookup, never on import.
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS responses (
+                        key TEXT PRIMARY KEY,
+                        source TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        fetch_seconds REAL NOT NULL,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        last_used REAL NOT NULL,
+                        hits INTEGER NOT NULL DEFAULT 0
+                    )
+                    """
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def key_for(source: str, query: str, arguments: Optional[Dict] = None) -> str:
+        return json.dumps(
+            [source, normalize_search_query(query), arguments or {}], sort_keys=True, default=str
+        )
+
+    def get(self, source: str, query: str, arguments: Optional[Dict] = None) -> Optional[str]:
+        key = self.key_for(source, query, arguments)
+        now = time.time()
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT response, fetch_seconds, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[2] < now:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            elif row is not None:
+                connection.execute(
+                    "UPDATE responses SET hits = hits + 1, last_used = ? WHERE key = ?", (now, key)
+                )
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            if row[2] < now:
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.seconds_saved += row[1]
+            return row[0]
+
+    def put(
+        self,
+        source: str,
+        query: str,
+        response: str,
+        arguments: Optional[Dict] = None,
+        fetch_seconds: float = 0.0,
+    ) -> None:
+        key = self.key_for(source, query, arguments)
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, source, query, response, fetch_seconds, created_at, expires_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, normalize_search_query(query), response, fetch_seconds,
+                 now, now + self.ttl_seconds, now),
+            )
+            (count,) = connection.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                connection.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+        with self._lock:
+            self.stores += 1
+
+    def purge_expired(self) -> int:
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),)).rowcount
+
+    def stats(self) -> dict:
+        entries = 0
+        if os.path.exists(self.path):
+            (entries,) = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "stores": self.stores,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "seconds_saved": round(self.seconds_saved, 3),
+                "entries": entries,
+            }
+
+
+_search_cache: Optional[SearchResponseCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def search_response_cache() -> SearchResponseCache:
+    """
+    Process-wide cache used by the Exa MCP server.
+    """
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = SearchResponseCache()
+    return _search_cache
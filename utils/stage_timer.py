@@ -0,0 +1,56 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+
+class StageTimer:
+    """
+    Accumulates wall-clock time per named pipeline stage.
+
+    Stages nest: while an inner stage runs the outer one is paused, so every
+    second is counted once, against the innermost stage. That makes it possible
+    to time chained generators (parse -> prepare -> ingest) that run interleaved.
+    """
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self._stack = []
+        self._last = None
+
+    def _switch(self) -> None:
+        now = time.perf_counter()
+        if self._stack:
+            self.seconds[self._stack[-1]] += now - self._last
+        self._last = now
+
+    @contextmanager
+    def stage(self, name: str):
+        self._switch()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def timed_iter(self, name: str, iterable: Iterable) -> Iterator:
+        """
+        Yield from iterable, charging the time spent producing each item to name.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def report(self) -> str:
+        total = sum(self.seconds.values())
+        lines = [f"Stage timings (total {total:.2f}s):"]
+        for name, seconds in self.seconds.items():
+            share = seconds / total * 100 if total else 0.0
+            lines.append(f"  {name:<10} {seconds:8.2f}s  {share:5.1f}%")
+        return "\n".join(lines)
@@ -0,0 +1,157 @@
+import sys
+import time
+from typing import Dict, Optional, TextIO
+
+from agents import Agent, Handoff, RunConfig, Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+from utils.answer_cache import SemanticAnswerCache, answer_with_cache
+from utils.metrics import metrics as metrics_registry, timer
+
+
+def _call_id(raw_item) -> Optional[str]:
+    if isinstance(raw_item, dict):
+        return raw_item.get("call_id")
+    return getattr(raw_item, "call_id", None)
+
+
+def _tool_name(raw_item) -> str:
+    return getattr(raw_item, "name", None) or getattr(raw_item, "type", "tool")
+
+
+def _handoff_tool_names(agent: Agent) -> set:
+    # handoffs reach the model as tool calls too, but are reported separately
+    return {
+        handoff.tool_name if isinstance(handoff, Handoff) else Handoff.default_tool_name(handoff)
+        for handoff in agent.handoffs
+    }
+
+
+class StreamPrinter:
+    """
+    Prints a streamed run as it happens: text deltas inline, tool calls,
+    handoffs and agent switches on their own lines.
+    """
+
+    def __init__(self, stream: TextIO = sys.stdout, show_events: bool = True):
+        self.stream = stream
+        self.show_events = show_events
+        self._in_text = False
+
+    def text(self, delta: str) -> None:
+        self.stream.write(delta)
+        self.stream.flush()
+        self._in_text = True
+
+    def _end_text(self) -> None:
+        if self._in_text:
+            self.stream.write("\n")
+            self._in_text = False
+
+    def event(self, message: str) -> None:
+        if not self.show_events:
+            return
+        self._end_text()
+        self.stream.write(f"[{message}]\n")
+        self.stream.flush()
+
+    def done(self, metrics: Dict) -> None:
+        self._end_text()
+        ttft = f"{metrics['ttft']:.2f}s" if metrics["ttft"] is not None else "n/a"
+        self.event(
+            f"time to first token {ttft}, total {metrics['total']:.2f}s, "
+            f"{len(metrics['tool_calls'])} tool calls"
+        )
+
+
+async def stream_agent(
+    agent: Agent,
+    input: str,
+    run_config: Optional[RunConfig] = None,
+    printer: Optional[StreamPrinter] = None,
+):
+    """
+    Run agent with Runner.run_streamed, surfacing text deltas and tool events as
+    they arrive. Returns (final_output, metrics) where metrics holds
+    ttft (seconds to the first text delta, None if there was no text),
+    first_event (seconds to the first tool call or text), total, and
+    tool_calls: one {"name", "seconds"} entry per finished tool call.
+    Pass printer=None to stream silently, e.g. when only the timings matter.
+    The total and ttft also go to the agent_run_seconds and agent_ttft_seconds histograms.
+    """
+    start = time.perf_counter()
+    metrics = {"ttft": None, "first_event": None, "total": None, "tool_calls": []}
+    tool_starts = {}
+    handoff_names = _handoff_tool_names(agent)
+
+    def seen_event():
+        if metrics["first_event"] is None:
+            metrics["first_event"] = time.perf_counter() - start
+
+    result = Runner.run_streamed(agent, input, run_config=run_config)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            seen_event()
+            if metrics["ttft"] is None:
+                metrics["ttft"] = time.perf_counter() - start
+            if printer is not None:
+                printer.text(event.data.delta)
+
+        elif event.type == "run_item_stream_event":
+            raw_item = event.item.raw_item
+            # emitted as soon as the model has written the call, i.e. when the tool starts
+            if event.name == "tool_called" and _tool_name(raw_item) not in handoff_names:
+                seen_event()
+                tool_starts[_call_id(raw_item)] = (_tool_name(raw_item), time.perf_counter())
+                if printer is not None:
+                    printer.event(f"tool {_tool_name(raw_item)} started")
+            elif event.name == "tool_output":
+                name, tool_start = tool_starts.pop(_call_id(raw_item), ("tool", start))
+                seconds = time.perf_counter() - tool_start
+                metrics["tool_calls"].append({"name": name, "seconds": seconds})
+                if printer is not None:
+                    printer.event(f"tool {name} finished in {seconds:.2f}s")
+            elif event.name == "handoff_requested" and printer is not None:
+                printer.event(f"handoff requested: {_tool_name(raw_item)}")
+
+        elif event.type == "agent_updated_stream_event":
+            handoff_names = _handoff_tool_names(event.new_agent)
+            if printer is not None:
+                printer.event(f"agent {event.new_agent.name}")
+
+    metrics["total"] = time.perf_counter() - start
+    metrics_registry().observe("agent_run_seconds", metrics["total"], agent=agent.name, mode="stream")
+    if metrics["ttft"] is not None:
+        metrics_registry().observe("agent_ttft_seconds", metrics["ttft"], agent=agent.name)
+    if printer is not None:
+        printer.done(metrics)
+    return result.final_output, metrics
+
+
+async def run_and_print(
+    agent: Agent,
+    input: str,
+    stream: bool = False,
+    run_config: Optional[RunConfig] = None,
+    answer_cache: Optional[SemanticAnswerCache] = None,
+):
+    """
+    What the agent scripts do with a question: stream it with live events,
+    or wait for the whole answer and print it. With an answer_cache, a question
+    similar enough to one answered before is answered from it without a run.
+    """
+
+    async def run():
+        if stream:
+            final_output, _ = await stream_agent(agent, input, run_config=run_config, printer=StreamPrinter())
+            return final_output
+        with timer("agent_run_seconds", agent=agent.name, mode="run"):
+            result = await Runner.run(agent, input, run_config=run_config)
+        print(result.final_output)
+        return result.final_output
+
+    final_output, from_cache = await answer_with_cache(answer_cache, agent.name, input, run)
+    if from_cache:
+        print(final_output)
+        print("[answered from the answer cache]")
+    return final_output
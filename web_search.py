@@ -4,49 +4,18 @@ exa search mcp is replaced by open ai built in web search tool
 You achieve the same functonality with both
 """
 
-import chromadb
-from agents import Agent, Runner, WebSearchTool,function_tool, trace
+from agents import Agent, ModelSettings, WebSearchTool, trace
+from utils.answer_cache import semantic_answer_cache
 from utils.app_config import AppConfig
+from utils.nutrition_tools import calorie_lookup_tool, meal_calories_tool
+from utils.retrieval_service import RetrievalService
+from utils.streaming import run_and_print
+import argparse
 import asyncio
 
 # load the environment
 config = AppConfig()
 
-chroma_client = chromadb.PersistentClient(path="chroma")
-nutrition_db = chroma_client.get_collection(name="nutrition_db")
-
-@function_tool
-def calorie_lookup_tool(query: str, max_results: int = 3) -> str:
-    """
-    Tool function for a RAG database to look up calorie information for specific food items, but not for meals.
-
-    Args:
-        query: The food item to look up.
-        max_results: The maximum number of results to return.
-
-    Returns:
-        A string containing the nutrition information.
-    """
-
-    results = nutrition_db.query(query_texts=[query], n_results=max_results)
-
-    if not results["documents"][0]:
-        return f"No nutrition information found for: {query}"
-
-    # Format results for the agent
-    formatted_results = []
-    for i, doc in enumerate(results["documents"][0]):
-        metadata = results["metadatas"][0][i]
-        food_item = metadata["food_item"].title() #title is built in method in string that capitalizes first letter of each word
-        calories = metadata["calories_per_100g"]
-        category = metadata["food_category"].title()
-
-        formatted_results.append(
-            f"{food_item} ({category}): {calories} calories per 100g"
-        )
-
-    return "Nutrition Information:\n" + "\n".join(formatted_results)
-
 calorie_agent_with_search = Agent(
     name="Nutrition Assistant",
     instructions="""
@@ -59,14 +28,19 @@ calorie_agent_with_search = Agent(
         information of the ingredients to make sure the information you provide is consistent.
         2) Then, if it's about a meal, use the calorie_lookup_tool to get the calorie information of the ingredients.
     * Even if you know the recipe of the meal, always use web search to find the exact recipe and ingredients.
-    * Once you know the ingredients, always use the calorie_lookup_tool to get the calorie information of the individual ingredients.
+    * Once you know the ingredients and their quantities for a single serving, get the calories of every ingredient and the total with a single call to the meal_calories_tool instead of looking them up one by one and adding them up yourself.
     * If the query is about the meal, in your final output give a list of ingredients with their quantities and calories for a single serving. Also display the total calories.
     * Don't use the calorie_lookup_tool more than 8 times.
     """,
-    tools=[calorie_lookup_tool, WebSearchTool()],
+    tools=[calorie_lookup_tool, meal_calories_tool, WebSearchTool()],
+    model_settings=ModelSettings(parallel_tool_calls=True),
 )
 
-async def main():
+async def main(stream: bool = False, answer_cache: bool = False):
+    cache = semantic_answer_cache() if answer_cache else None
+
+    # open chroma and load the embedding model before the first tool call
+    RetrievalService().warmup()
 
     question = "How many calories are in an english breakfast?"
     #This search will involve mcp
@@ -74,11 +48,11 @@ async def main():
 
         print(f"Answering question:{question}")
 
-        result = await Runner.run(
-            calorie_agent_with_search,
-            question
-        )
-        print(result.final_output)
+        await run_and_print(calorie_agent_with_search, question, stream, answer_cache=cache)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stream", action="store_true", help="print the answer and tool calls as they happen")
+    parser.add_argument("--answer-cache", action="store_true", help="reuse the answer to a similar earlier question")
+    args = parser.parse_args()
+    asyncio.run(main(args.stream, args.answer_cache))